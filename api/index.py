@@ -1,3 +1,8 @@
+import os
+
+# Cold starts skip schema creation, migrations and CLI commands; see app.py
+os.environ.setdefault('SERVERLESS', 'true')
+
 from app import handler
 from vercel_python import vercel_request, vercel_response
 
@@ -2,10 +2,12 @@
 
 from flask import Flask, render_template
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_bcrypt import Bcrypt
 from dotenv import load_dotenv
+from config import config, engine_profile_name
+from services.db_pool import engine_options
+from datetime import datetime
 import os
 import logging
 
@@ -14,32 +16,96 @@ load_dotenv()
 
 # Initialize Flask application
 app = Flask(__name__, static_folder='static')
+# Serverless mode skips work a cold start does not need: schema creation, migrations and CLI commands
+app.config['SERVERLESS'] = os.environ.get('SERVERLESS', 'true' if os.environ.get('VERCEL') else 'false').lower() == 'true'
+app.config.from_object(config[os.environ.get('APP_CONFIG', 'production')])
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-for-testing')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', '').replace('postgres://', 'postgresql://', 1)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', '').replace('postgres://', 'postgresql://', 1) or app.config['SQLALCHEMY_DATABASE_URI']
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['DB_PROFILE'] = engine_profile_name(app.config)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+app.config['MASTERY_WINDOW'] = int(os.environ.get('MASTERY_WINDOW', 20))
+app.config['QUESTION_POOL_ENABLED'] = os.environ.get('QUESTION_POOL_ENABLED', 'false').lower() == 'true'
+app.config['QUESTION_POOL_GENERATOR'] = os.environ.get('QUESTION_POOL_GENERATOR', 'gemini')  # 'gemini' or 'stub'
+app.config['QUESTION_POOL_LOW_WATER'] = int(os.environ.get('QUESTION_POOL_LOW_WATER', 3))
+app.config['QUESTION_POOL_TARGET'] = int(os.environ.get('QUESTION_POOL_TARGET', 10))
+app.config['QUESTION_BATCH_SIZE'] = int(os.environ.get('QUESTION_BATCH_SIZE', 5))
+app.config['QUESTION_REUSE_RATIO'] = float(os.environ.get('QUESTION_REUSE_RATIO', 0.8))  # Share of requests that try the question bank first
+app.config['QUESTION_REUSE_BAND'] = int(os.environ.get('QUESTION_REUSE_BAND', 0))  # Accepted +/- difficulty when reusing
+app.config['IRT_TARGET_SUCCESS'] = float(os.environ.get('IRT_TARGET_SUCCESS', 0.7))  # Predicted success rate aimed for once questions are calibrated
+app.config['SESSION_PREFETCH_SIZE'] = int(os.environ.get('SESSION_PREFETCH_SIZE', 5))  # Questions per /learn/session call by default
+app.config['SESSION_PREFETCH_MAX'] = int(os.environ.get('SESSION_PREFETCH_MAX', 20))
+app.config['BULK_ANSWER_LIMIT'] = int(os.environ.get('BULK_ANSWER_LIMIT', 50))  # Answers accepted per /learn/submit-answers request
+app.config['GRADING_ASYNC'] = os.environ.get('GRADING_ASYNC', 'false').lower() == 'true'  # Grade ambiguous free recall in the background; ignored when serverless
+app.config['GRADING_WORKERS'] = int(os.environ.get('GRADING_WORKERS', 2))
+app.config['GRADING_QUEUE_SIZE'] = int(os.environ.get('GRADING_QUEUE_SIZE', 1000))
+app.config['GRADING_BATCH_SIZE'] = int(os.environ.get('GRADING_BATCH_SIZE', 8))  # Pending answers graded per model call
+app.config['GRADING_BATCH_WAIT'] = float(os.environ.get('GRADING_BATCH_WAIT', 0.05))  # Seconds a worker waits to fill a batch
+app.config['GRADING_SWEEP_INTERVAL'] = float(os.environ.get('GRADING_SWEEP_INTERVAL', 30))  # Seconds between re-queues of pending rows
+app.config['GRADING_EVENTS_TIMEOUT'] = float(os.environ.get('GRADING_EVENTS_TIMEOUT', 60))  # Seconds an answer event stream waits
+app.config['QUESTION_PAYLOAD_CACHE_SIZE'] = int(os.environ.get('QUESTION_PAYLOAD_CACHE_SIZE', 20000))  # Serialized question payloads kept in memory
+app.config['GRADING_CACHE_SIZE'] = int(os.environ.get('GRADING_CACHE_SIZE', 10000))
+app.config['GRADING_CACHE_TTL'] = int(os.environ.get('GRADING_CACHE_TTL', 3600))  # Seconds a verdict stays in memory
+app.config['MOCK_STREAM_DELAY'] = float(os.environ.get('MOCK_STREAM_DELAY', 0.05))  # Seconds between mock stream chunks
+app.config['LLM_BACKEND'] = os.environ.get('LLM_BACKEND', 'gemini')  # 'gemini' or 'fake'
+app.config['LLM_MODEL'] = os.environ.get('LLM_MODEL', 'gemini-flash')
+app.config['LLM_TIMEOUT'] = float(os.environ.get('LLM_TIMEOUT', 20))  # Per-call deadline in seconds
+app.config['LLM_MAX_RETRIES'] = int(os.environ.get('LLM_MAX_RETRIES', 2))
+app.config['LLM_BACKOFF'] = float(os.environ.get('LLM_BACKOFF', 0.5))  # Base seconds for jittered exponential backoff
+app.config['LLM_BREAKER_THRESHOLD'] = int(os.environ.get('LLM_BREAKER_THRESHOLD', 5))  # Consecutive failures before failing fast
+app.config['LLM_BREAKER_RESET'] = float(os.environ.get('LLM_BREAKER_RESET', 30))  # Seconds before a trial call is let through
+app.config['LLM_MAX_CONCURRENCY'] = int(os.environ.get('LLM_MAX_CONCURRENCY', 16))  # Worker threads, including ones still held by timed-out calls
+app.config['LLM_FAKE_LATENCY'] = float(os.environ.get('LLM_FAKE_LATENCY', 0.0))
+app.config['LLM_FAKE_ERROR_RATE'] = float(os.environ.get('LLM_FAKE_ERROR_RATE', 0.0))
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 10000))
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))  # Seconds; 0 disables the session loader cache
+app.config['METRICS_SLOW_REQUEST'] = float(os.environ.get('METRICS_SLOW_REQUEST', 1.0))  # Seconds; slower requests may be logged with their SQL
+app.config['METRICS_SLOW_SAMPLE_RATE'] = float(os.environ.get('METRICS_SLOW_SAMPLE_RATE', 0.1))  # Share of slow requests logged
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')  # Bearer token for /metrics; unset serves 404
+app.config['ARCHIVE_DIR'] = os.environ.get('ARCHIVE_DIR', 'answer-archive')  # Where archived answers are written as gzip NDJSON
+app.config['ARCHIVE_HORIZON_DAYS'] = int(os.environ.get('ARCHIVE_HORIZON_DAYS', 365))  # Graded answers older than this are archived
+app.config['RESPONSE_CACHE_BACKEND'] = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')  # 'memory' or 'redis'
+app.config['RESPONSE_CACHE_URL'] = os.environ.get('RESPONSE_CACHE_URL', 'redis://localhost:6379/0')
+app.config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('RESPONSE_CACHE_SIZE', 5000))
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 300))  # Seconds
 
 # Initialize extensions
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
 bcrypt = Bcrypt(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
 
-# Database initialization
-@app.before_first_request
-def initialize_database():
-    try:
-        db.create_all()
-        print("Database initialized successfully!")
-    except Exception as e:
-        print(f"Error initializing database: {e}")
+# Connection pool checkout and churn metrics, plus SQLite pragmas for the sqlite profile
+from services.db_pool import pool_metrics
+pool_metrics.init_app(app)
+
+# Per-request DB, LLM, bcrypt and render timing: Server-Timing headers, /metrics and the slow-request log
+from services.instrumentation import request_metrics
+request_metrics.init_app(app)
+
+# Database initialization; serverless deployments run `SERVERLESS=false flask db upgrade` as a release step instead
+if not app.config['SERVERLESS']:
+    @app.before_first_request
+    def initialize_database():
+        try:
+            db.create_all()
+            print("Database initialized successfully!")
+        except Exception as e:
+            print(f"Error initializing database: {e}")
 
 # Import models
 from models.user import User
 from models.question import Question
 from models.answer import Answer
 from models.subject import Subject
+from models.mastery import Mastery
+from models.grading_verdict import GradingVerdict
+from models.daily_rollup import DailyRollup
+from models.difficulty_rollup import DifficultyRollup
+from models.review_state import ReviewState
+from models.archived_daily_total import ArchivedDailyTotal
+from models.archived_difficulty_total import ArchivedDifficultyTotal
 
 # Import blueprints
 from controllers.auth import auth
@@ -53,6 +119,46 @@ app.register_blueprint(learning, url_prefix='/learn')
 app.register_blueprint(dashboard, url_prefix='/dashboard')
 app.register_blueprint(api, url_prefix='/api')
 
+# Shared LLM client (built before the services that call it)
+from services.llm import llm
+llm.init_app(app)
+
+# Background question pool
+from services.question_pool import question_pool
+question_pool.init_app(app)
+
+# Serialized question payloads
+from services.question_serializer import question_serializer
+question_serializer.init_app(app)
+
+# Free-recall verdict cache
+from services.grading_cache import grading_cache
+grading_cache.init_app(app)
+
+# Background grading of pending free-recall answers
+from services.grading_queue import grading_queue
+grading_queue.init_app(app)
+
+# Dashboard response cache
+from services.response_cache import response_cache
+response_cache.init_app(app)
+
+# Session loader cache of user records
+from services.user_cache import user_cache
+user_cache.init_app(app)
+
+# Migrations and CLI commands pull in Alembic and the benchmark tooling, which requests never use
+if not app.config['SERVERLESS']:
+    from flask_migrate import Migrate
+    migrate = Migrate(app, db)
+
+    import commands
+
+@app.context_processor
+def inject_now():
+    # base.html's footer shows the current year
+    return {'now': datetime.utcnow()}
+
 @app.route('/')
 def index():
     return render_template('index.html')
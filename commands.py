@@ -0,0 +1,608 @@
+import click
+from flask import g
+import time
+from app import app, db
+from models.user import User
+from models.subject import Subject
+from models.answer import Answer
+from models.question import Question
+from models.mastery import Mastery
+from models.review_state import ReviewState
+from services.question_generation import GeminiGenerator
+from services.llm import llm, LLMClient, FakeBackend
+from services.grading_cache import grading_cache
+from services.user_cache import user_cache
+from services.local_grader import grade_locally
+from services import rollups
+from services.query_counter import count_queries
+from services import synthetic_data, query_plans, load_driver, startup_profile
+from sqlalchemy import create_engine, func, select, update, bindparam
+import tempfile
+import json
+import os
+
+def _require_full_history(live_only):
+    """Stop a replay of Answer history when part of it is archived, unless live rows only were asked for."""
+    from services import answer_archive
+
+    if not live_only and answer_archive.has_archived():
+        raise SystemExit("Some answers are archived, so Answer no longer holds the full history. "
+                         "Restore them with restore-answers first, or pass --live-only to use the rows still in the table.")
+
+@app.cli.command('backfill-mastery')
+@click.option('--batch-size', default=1000, show_default=True, help='Answers fetched per round trip.')
+@click.option('--live-only', is_flag=True, help='Rebuild from unarchived answers even though some are archived.')
+def backfill_mastery(batch_size, live_only):
+    """Rebuild per-user, per-subject mastery aggregates from Answer history, keeping calibrated abilities."""
+    _require_full_history(live_only)
+    window = app.config['MASTERY_WINDOW']
+    # Abilities come from calibrate-irt, not from the replay
+    abilities = {
+        (user_id, subject_id): ability
+        for user_id, subject_id, ability in db.session.query(Mastery.user_id, Mastery.subject_id, Mastery.irt_ability)
+                                                      .filter(Mastery.irt_ability.isnot(None))
+    }
+    Mastery.query.delete()
+
+    # Replay answers in the order they were given so difficulty steps match the live path
+    rows = db.session.query(
+        Answer.user_id,
+        Question.subject_id,
+        Answer.is_correct
+    ).join(Question, Answer.question_id == Question.id)\
+     .filter(Answer.is_correct.isnot(None))\
+     .order_by(Answer.user_id, Question.subject_id, Answer.created_at, Answer.id)\
+     .execution_options(yield_per=batch_size)
+
+    current = None
+    built = 0
+    for user_id, subject_id, is_correct in rows:
+        if current is None or (current.user_id, current.subject_id) != (user_id, subject_id):
+            if current is not None:
+                db.session.add(current)
+                built += 1
+            current = Mastery(user_id=user_id, subject_id=subject_id, attempts=0, correct=0, recent='', difficulty=1,
+                              irt_ability=abilities.get((user_id, subject_id)))
+        current.record(is_correct, window)
+
+    if current is not None:
+        db.session.add(current)
+        built += 1
+
+    db.session.commit()
+    click.echo(f"Built {built} mastery records.")
+
+@app.cli.command('backfill-reviews')
+@click.option('--batch-size', default=1000, show_default=True, help='Answers fetched per round trip.')
+@click.option('--live-only', is_flag=True, help='Rebuild from unarchived answers even though some are archived.')
+def backfill_reviews(batch_size, live_only):
+    """Rebuild spaced-repetition review state from Answer history."""
+    _require_full_history(live_only)
+    ReviewState.query.delete()
+
+    # Replay each user's answers to a question in order, as submit_answer would have scheduled them
+    rows = db.session.query(
+        Answer.user_id,
+        Answer.question_id,
+        Answer.is_correct,
+        Answer.response_time,
+        Answer.created_at
+    ).filter(Answer.is_correct.isnot(None))\
+     .order_by(Answer.user_id, Answer.question_id, Answer.created_at, Answer.id)\
+     .execution_options(yield_per=batch_size)
+
+    current = None
+    built = 0
+    for user_id, question_id, is_correct, response_time, created_at in rows:
+        if current is None or (current.user_id, current.question_id) != (user_id, question_id):
+            if current is not None:
+                db.session.add(current)
+                built += 1
+            current = ReviewState(user_id=user_id, question_id=question_id, repetitions=0, interval_days=0, ease=2.5, lapses=0)
+        current.schedule(ReviewState.quality(is_correct, response_time), created_at)
+
+    if current is not None:
+        db.session.add(current)
+        built += 1
+
+    db.session.commit()
+    click.echo(f"Built {built} review states.")
+
+@app.cli.command('calibrate-irt')
+@click.option('--model', type=click.Choice(['1pl', '2pl']), default='2pl', show_default=True)
+@click.option('--chunk-size', default=100000, show_default=True, help='Answers fetched and processed per chunk.')
+@click.option('--min-answers', default=5, show_default=True, help='Answers a question needs before its calibration is stored.')
+@click.option('--max-iter', default=100, show_default=True)
+@click.option('--live-only', is_flag=True, help='Fit to unarchived answers even though some are archived.')
+def calibrate_irt(model, chunk_size, min_answers, max_iter, live_only):
+    """Fit question difficulty and per-subject learner ability to Answer outcomes and store them."""
+    from services import irt  # NumPy is only needed by the offline jobs
+
+    _require_full_history(live_only)
+
+    # Answers still waiting for a grade carry no outcome to fit
+    total = db.session.query(func.count(Answer.id)).filter(Answer.is_correct.isnot(None)).scalar()
+    if not total:
+        click.echo("No answers to calibrate against.")
+        return
+
+    # Ability is estimated per (user, subject), packed into one integer key
+    stride = db.session.query(func.max(Subject.id)).scalar() + 1
+    rows = db.session.execute(
+        select(Answer.user_id * stride + Question.subject_id, Answer.question_id, Answer.is_correct)
+        .join(Question, Answer.question_id == Question.id)
+        .where(Answer.is_correct.isnot(None))
+        .execution_options(yield_per=chunk_size)
+    ).partitions()
+
+    start = time.perf_counter()
+    person, item, correct, person_keys, item_keys = irt.load_responses(rows, total)
+    loaded = time.perf_counter() - start
+    result = irt.fit(person, item, correct, len(person_keys), len(item_keys), model=model, max_iter=max_iter, chunk_size=chunk_size)
+    fitted = time.perf_counter() - start - loaded
+
+    calibrated = [
+        {'id': int(question_id), 'irt_difficulty': float(difficulty), 'irt_discrimination': float(discrimination)}
+        for question_id, difficulty, discrimination, count in zip(
+            item_keys, result['difficulty'], result['discrimination'], result['item_counts']
+        ) if count >= min_answers
+    ]
+    for offset in range(0, len(calibrated), chunk_size):
+        db.session.execute(update(Question), calibrated[offset:offset + chunk_size])
+
+    abilities = [
+        {'user': int(key // stride), 'subject': int(key % stride), 'ability': float(ability)}
+        for key, ability in zip(person_keys, result['ability'])
+    ]
+    set_ability = update(Mastery).where(
+        Mastery.user_id == bindparam('user'),
+        Mastery.subject_id == bindparam('subject')
+    ).values(irt_ability=bindparam('ability'))
+    for offset in range(0, len(abilities), chunk_size):
+        db.session.connection().execute(set_ability, abilities[offset:offset + chunk_size])
+    db.session.commit()
+
+    click.echo(f"Fitted {model.upper()} to {total} answers in {result['iterations']} iterations "
+               f"(load {loaded:.1f}s, fit {fitted:.1f}s, mean log-likelihood {result['log_likelihood']:.4f}).")
+    click.echo(f"Calibrated {len(calibrated)} of {len(item_keys)} questions and {len(abilities)} learner/subject abilities.")
+
+@app.cli.command('bench-irt')
+@click.option('--sizes', default='100000,1000000,5000000', show_default=True, help='Comma-separated answer counts.')
+@click.option('--model', type=click.Choice(['1pl', '2pl']), default='2pl', show_default=True)
+@click.option('--chunk-size', default=1000000, show_default=True)
+def bench_irt(sizes, model, chunk_size):
+    """Time IRT calibration against dataset size on answers simulated from a known model."""
+    import numpy as np
+    from services import irt
+
+    click.echo(f"{'answers':>10}{'learners':>10}{'items':>9}{'iters':>7}{'fit s':>9}{'answers/s':>12}{'array MB':>10}{'difficulty r':>14}")
+    for size in (int(value) for value in sizes.split(',')):
+        persons, items = max(100, size // 200), max(50, size // 100)
+        person, item, correct, truth = irt.simulate(size, persons, items)
+        start = time.perf_counter()
+        result = irt.fit(person, item, correct, persons, items, model=model, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        array_mb = (person.nbytes + item.nbytes + correct.nbytes) / 1e6
+        recovery = np.corrcoef(result['difficulty'], truth['difficulty'])[0, 1]
+        click.echo(f"{size:>10}{persons:>10}{items:>9}{result['iterations']:>7}{elapsed:>9.2f}"
+                   f"{size / elapsed:>12.0f}{array_mb:>10.1f}{recovery:>14.3f}")
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups():
+    """Recompute the dashboard rollup tables from Answer history."""
+    daily, by_difficulty, users = rollups.rebuild()
+    click.echo(f"Built {daily} daily and {by_difficulty} difficulty rollup rows; totals changed for {users} users.")
+
+@app.cli.command('check-rollups')
+def check_rollups():
+    """Compare rollup tables against raw Answer rows; exits non-zero on any mismatch."""
+    mismatches = rollups.check()
+    for table, key, expected, stored in mismatches:
+        click.echo(f"{table} {key}: expected {expected}, stored {stored}")
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} rollup rows disagree with Answer history.")
+    click.echo("Rollups match Answer history.")
+
+@app.cli.command('invalidate-verdicts')
+@click.argument('question_id', type=int)
+def invalidate_verdicts(question_id):
+    """Drop cached free-recall verdicts for a question."""
+    deleted = grading_cache.invalidate_question(question_id)
+    click.echo(f"Removed {deleted} stored verdicts for question {question_id}.")
+
+@app.cli.command('bench-generation')
+@click.option('--items', default=50, show_default=True, help='Questions to generate per run.')
+@click.option('--batch-size', default=None, type=int, help='Batch size to compare against one-at-a-time (defaults to QUESTION_BATCH_SIZE).')
+@click.option('--call-latency', default=0.8, show_default=True, help='Simulated fixed seconds per model call.')
+@click.option('--token-latency', default=0.002, show_default=True, help='Simulated seconds per generated word.')
+def bench_generation(items, batch_size, call_latency, token_latency):
+    """Compare one-question-per-call generation with batched generation against a fake model."""
+    batch_size = batch_size or app.config['QUESTION_BATCH_SIZE']
+    client = LLMClient(backend=FakeBackend(latency=call_latency, token_latency=token_latency))
+
+    for label, size in (('single', 1), (f'batch({batch_size})', batch_size)):
+        generator = GeminiGenerator(client, batch_size=size)
+        start = time.perf_counter()
+        generated = generator('Benchmark', 1, count=items)
+        elapsed = time.perf_counter() - start
+        click.echo(f"{label:>12}: {len(generated)} items in {elapsed:.2f}s, "
+                   f"{len(generated) / elapsed:.2f} items/s, {elapsed / len(generated) * 1000:.0f} ms/item")
+
+@app.cli.command('bench-serialization')
+@click.option('--repeat', default=200, show_default=True, help='Passes over a batch of 100 questions.')
+def bench_serialization(repeat):
+    """Compare hand-built question JSON with the cached serializer, one at a time and in batches of 100."""
+    from datetime import datetime
+    from services.question_serializer import QuestionSerializer, VARIANTS
+    from services.cache import LRUCache
+
+    subject = Subject(id=1, name='Benchmark')
+    questions = [
+        Question(id=index, text=f'Question {index} about a fairly typical topic?', answer='An answer', difficulty=index % 10 + 1,
+                 subject_id=1, subject=subject, created_at=datetime(2026, 1, 1), correct_option='a',
+                 option_a='First option', option_b='Second option', option_c='Third option', option_d='Fourth option')
+        for index in range(1, 101)
+    ]
+
+    def hand_built(question, variant):
+        # What the controllers did before: a fresh dict per request, encoded like jsonify
+        payload = {'id': question.id, 'text': question.text, 'difficulty': question.difficulty}
+        if variant != 'free_recall':
+            payload['options'] = {'a': question.option_a, 'b': question.option_b, 'c': question.option_c, 'd': question.option_d}
+        if variant == 'full':
+            payload.update(subject_id=question.subject_id, subject_name=question.subject.name,
+                           created_at=question.created_at.strftime('%Y-%m-%d %H:%M:%S'))
+        return json.dumps(payload, sort_keys=True)
+
+    def rate(function):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return repeat * len(questions) / (time.perf_counter() - start)
+
+    serializer = QuestionSerializer()
+    serializer.lru = LRUCache(max_size=len(questions) * len(VARIANTS))
+    click.echo(f"Encoder: {serializer.stats()['encoder']}")
+    click.echo(f"{'variant':<17}{'hand-built':>12}{'cold single':>13}{'warm single':>13}{'warm batch':>12}  (questions/s)")
+    for variant in VARIANTS:
+        def cold():
+            serializer.lru.clear()
+            for question in questions:
+                serializer.encoded(question, variant)
+
+        baseline = rate(lambda: [hand_built(question, variant) for question in questions])
+        cold_single = rate(cold)
+        warm_single = rate(lambda: [serializer.encoded(question, variant) for question in questions])
+        warm_batch = rate(lambda: b','.join(encoded for _, encoded in serializer.serialize_many(questions, variant)))
+        click.echo(f"{variant:<17}{baseline:>12.0f}{cold_single:>13.0f}{warm_single:>13.0f}{warm_batch:>12.0f}")
+
+@app.cli.command('eval-local-grader')
+@click.option('--corpus', default=os.path.join(os.path.dirname(__file__), 'services', 'local_grader_corpus.json'),
+              show_default=True, help='JSON list of {answer, response, correct, wrong?} examples.')
+@click.option('--repeat', default=200, show_default=True, help='Passes over the corpus when timing.')
+def eval_local_grader(corpus, repeat):
+    """Report how much free-recall grading the local fast path settles and how accurately."""
+    with open(corpus) as f:
+        examples = json.load(f)
+
+    settled = right = false_accepts = false_rejects = 0
+    for example in examples:
+        verdict = grade_locally(example['response'], example['answer'], example.get('wrong', ()))
+        if verdict is None:
+            continue
+        settled += 1
+        if verdict == example['correct']:
+            right += 1
+        elif verdict:
+            false_accepts += 1
+        else:
+            false_rejects += 1
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for example in examples:
+            grade_locally(example['response'], example['answer'], example.get('wrong', ()))
+    per_answer = (time.perf_counter() - start) / (repeat * len(examples))
+
+    click.echo(f"Examples: {len(examples)}")
+    click.echo(f"Settled locally: {settled} ({settled / len(examples) * 100:.1f}% of LLM calls removed)")
+    click.echo(f"Accuracy on settled: {right / settled * 100 if settled else 0:.1f}% "
+               f"({false_accepts} false accepts, {false_rejects} false rejects)")
+    click.echo(f"Time per answer: {per_answer * 1e6:.1f} us")
+
+@app.cli.command('check-query-counts')
+@click.option('--user-id', default=None, type=int, help='User whose session drives the requests (default: the busiest user).')
+@click.option('--seed', 'seed_if_empty', is_flag=True, help='Seed a small synthetic dataset first when the database has no users.')
+def check_query_counts(user_id, seed_if_empty):
+    """Request each dashboard endpoint as a user and fail if any runs more queries than its budget.
+
+    In CI, point DATABASE_URL at a scratch database and pass --seed, so the check brings its own data.
+    """
+    from services.query_counter import endpoint_query_counts
+
+    db.create_all()
+    if seed_if_empty and db.session.query(User.id).first() is None:
+        with db.engine.begin() as connection:
+            synthetic_data.seed(connection, users=20, subjects=5, questions=500, answers=5000)
+            synthetic_data.derive_aggregates(connection)
+    if user_id is None:
+        with db.engine.connect() as connection:
+            user_id = connection.execute(
+                select(Answer.user_id).group_by(Answer.user_id).order_by(func.count(Answer.id).desc()).limit(1)
+            ).scalar()
+        if user_id is None:
+            raise SystemExit("No answers to drive the check with; pass --seed on a scratch database.")
+    db.session.remove()
+
+    over_budget = 0
+    for path, status_code, statements, budget in endpoint_query_counts(app, db, user_id):
+        status = 'ok' if len(statements) <= budget and status_code == 200 else 'FAIL'
+        over_budget += status != 'ok'
+        click.echo(f"{status:>4} {path}: {len(statements)} queries (budget {budget}), HTTP {status_code}")
+        for statement in statements:
+            click.echo(f"       {' '.join(statement.split())[:120]}")
+
+    if over_budget:
+        raise SystemExit(f"{over_budget} endpoints exceeded their query budget.")
+
+# Request mixes for the user cache benchmark; a None path toggles display_explanations
+USER_CACHE_MIXES = {
+    'dashboard polling': ['/dashboard/stats', '/dashboard/recent-activity', '/api/pool-stats', '/api/llm-stats'],
+    'preference edits': [None, '/dashboard/stats', '/api/llm-stats', None, '/dashboard/stats'],
+    'preferences page': ['/auth/preferences', '/dashboard/stats', '/dashboard/activity?limit=20']
+}
+
+@app.cli.command('bench-user-cache')
+@click.option('--user-id', required=True, type=int, help='User whose session drives the requests.')
+@click.option('--rounds', default=20, show_default=True, help='Passes over each request mix.')
+def bench_user_cache(user_id, rounds):
+    """Compare queries per request with the session loader cache off and on, and fail on any stale preference read."""
+    from flask_login import current_user
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise SystemExit(f"No user {user_id}.")
+    original = user.display_explanations
+    db.session.remove()
+
+    previous_enabled, previous_csrf = user_cache.enabled, app.config.get('WTF_CSRF_ENABLED', True)
+    app.config['WTF_CSRF_ENABLED'] = False
+    stale_reads = 0
+    click.echo(f"{'mix':<20}{'requests':>9}{'uncached':>10}{'cached':>8}{'saved/req':>11}{'hit rate':>10}")
+    try:
+        for name, paths in USER_CACHE_MIXES.items():
+            queries = {}
+            for enabled in (False, True):
+                user_cache.enabled = enabled
+                user_cache.lru.clear()
+                client = app.test_client()
+                with client.session_transaction() as session:
+                    session['_user_id'] = str(user_id)
+                    session['_fresh'] = True
+                hits_before = user_cache.stats()['hits']
+                expected, total = original, 0
+                for _ in range(rounds):
+                    for path in paths:
+                        # Requests share the command's app context, so drop what a real request would not inherit
+                        g.pop('_login_user', None)
+                        db.session.remove()
+                        with client, count_queries(db.engine) as statements:
+                            if path is None:
+                                expected = not expected
+                                client.post('/api/toggle-preference',
+                                            json={'preference': 'display_explanations', 'value': expected})
+                            else:
+                                client.get(path)
+                                stale_reads += current_user.display_explanations != expected
+                        total += len(statements)
+                queries[enabled] = total / (rounds * len(paths))
+                hits = user_cache.stats()['hits'] - hits_before
+            click.echo(f"{name:<20}{rounds * len(paths):>9}{queries[False]:>10.2f}{queries[True]:>8.2f}"
+                       f"{queries[False] - queries[True]:>11.2f}{hits / (rounds * len(paths)) * 100:>9.1f}%")
+    finally:
+        user_cache.enabled = previous_enabled
+        user_cache.lru.clear()
+        app.config['WTF_CSRF_ENABLED'] = previous_csrf
+        g.pop('_login_user', None)
+        db.session.remove()
+        User.query.filter_by(id=user_id).update({'display_explanations': original})
+        db.session.commit()
+
+    if stale_reads:
+        raise SystemExit(f"{stale_reads} requests saw a stale preference after a write.")
+    click.echo("No request saw a stale preference after a write.")
+
+@app.cli.command('check-query-plans')
+@click.option('--users', default=200, show_default=True)
+@click.option('--questions', default=20000, show_default=True)
+@click.option('--answers', default=200000, show_default=True)
+def check_query_plans(users, questions, answers):
+    """Seed a synthetic SQLite database and fail if any hot query plan scans a growing table."""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'plans.db')}")
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            synthetic_data.seed(connection, users=users, questions=questions, answers=answers)
+            synthetic_data.derive_aggregates(connection)
+            connection.exec_driver_sql('ANALYZE')
+
+        failures = 0
+        with engine.connect() as connection:
+            user_id, subject_id, question_id = query_plans.pick_heavy_keys(connection)
+            for name, statement in query_plans.hot_queries(user_id, subject_id, question_id):
+                plan = query_plans.explain(connection, statement)
+                problems = query_plans.plan_problems(plan)
+                failures += bool(problems)
+                click.echo(f"{'FAIL' if problems else '  ok'} {name}")
+                for line in plan:
+                    click.echo(f"       {line}")
+        engine.dispose()
+
+    if failures:
+        raise SystemExit(f"{failures} hot queries have plans that scan growing tables.")
+
+@app.cli.command('bench-load')
+@click.option('--users', default=50, show_default=True, help='Synthetic users to seed; each runs one concurrent study session.')
+@click.option('--subjects', default=10, show_default=True)
+@click.option('--questions', default=2000, show_default=True)
+@click.option('--answers', default=20000, show_default=True, help='Answer history to seed before the run.')
+@click.option('--concurrency', default=8, show_default=True, help='Sessions running at once.')
+@click.option('--iterations', default=10, show_default=True, help='Question/answer/dashboard rounds per session.')
+@click.option('--llm-latency', default=0.2, show_default=True, help='Simulated seconds per model call.')
+@click.option('--llm-error-rate', default=0.0, show_default=True, help='Share of model calls that fail.')
+@click.option('--seed', default=0, show_default=True)
+@click.option('--reuse-data', is_flag=True, help='Skip seeding and drive the synthetic users already in the database.')
+@click.option('--output', default='load-report.json', show_default=True, help='Where to write the JSON report.')
+def bench_load(users, subjects, questions, answers, concurrency, iterations, llm_latency, llm_error_rate, seed, reuse_data, output):
+    """Seed synthetic data, drive concurrent study sessions against a fake model and report per-endpoint throughput."""
+    db.create_all()
+    dataset = None
+    if not reuse_data:
+        if db.session.query(User.id).first() is not None:
+            raise SystemExit("The database already has users. Point DATABASE_URL at a scratch database or pass --reuse-data.")
+        with db.engine.begin() as connection:
+            dataset = synthetic_data.seed(connection, users=users, subjects=subjects, questions=questions,
+                                          answers=answers, seed=seed)
+            synthetic_data.derive_aggregates(connection)
+
+    # Seeded users all share the password 'password'
+    accounts = [
+        {'email': email, 'password': 'password', 'interactive_mode': interactive_mode}
+        for email, interactive_mode in db.session.query(User.email, User.interactive_mode)
+                                               .filter(User.email.like('user%@example.com'))
+                                               .order_by(User.id).limit(users)
+    ]
+    subject_ids = [subject_id for subject_id, in db.session.query(Subject.id)]
+    db.session.remove()
+    if not accounts or not subject_ids:
+        raise SystemExit("No synthetic users or subjects to drive; run without --reuse-data first.")
+
+    previous_backend = llm.backend
+    app.config['WTF_CSRF_ENABLED'] = False
+    llm.backend = FakeBackend(latency=llm_latency, error_rate=llm_error_rate, seed=seed)
+    try:
+        report = load_driver.run(app, db.engine, accounts, subject_ids, concurrency, iterations, seed)
+    finally:
+        llm.backend = previous_backend
+
+    report['meta']['dataset'] = dataset
+    report['meta']['llm'] = {'latency': llm_latency, 'error_rate': llm_error_rate}
+    report['llm_stats'] = {key: value for key, value in llm.stats().items() if key != 'breaker_state'}
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    click.echo(f"{'endpoint':<22}{'requests':>9}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}")
+    for name, stats in report['endpoints'].items():
+        latency = stats['latency_ms']
+        click.echo(f"{name:<22}{stats['requests']:>9}{stats['errors']:>8}{stats['rps']:>9.1f}"
+                   f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}{stats['queries_per_request']['mean']:>9.1f}")
+    totals = report['totals']
+    click.echo(f"{totals['requests']} requests in {totals['elapsed_s']:.1f}s ({totals['rps']:.1f} req/s, {totals['errors']} errors). "
+               f"Report written to {output}.")
+
+@app.cli.command('profile-startup')
+@click.option('--serverless/--no-serverless', default=True, show_default=True, help='Profile the serverless startup mode.')
+@click.option('--top', default=15, show_default=True, help='Heaviest packages to list.')
+@click.option('--budget-ms', default=None, type=float, help='Fail if time to first response exceeds this.')
+@click.option('--path', default=startup_profile.DEFAULT_PATH, show_default=True,
+              help='Page to request; must answer 2xx without a login.')
+def profile_startup(serverless, top, budget_ms, path):
+    """Cold-start the app in a fresh interpreter and report import time per package and time to first response."""
+    try:
+        timings = startup_profile.profile(os.path.dirname(os.path.abspath(__file__)), serverless=serverless, path=path)
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+
+    click.echo(f"{'package':<32}{'import ms':>10}")
+    for package, seconds in startup_profile.top_level(timings['modules'])[:top]:
+        click.echo(f"{package:<32}{seconds * 1000:>10.1f}")
+    first_response_ms = timings['first_response_s'] * 1000
+    click.echo(f"Imported app in {timings['import_s'] * 1000:.0f} ms; first response (GET {path}, HTTP {timings['status']}) "
+               f"after {first_response_ms:.0f} ms, {'serverless' if serverless else 'server'} mode.")
+    if budget_ms is not None and first_response_ms > budget_ms:
+        raise SystemExit(f"Time to first response {first_response_ms:.0f} ms is over the {budget_ms:.0f} ms budget.")
+
+@app.cli.command('recover-grading')
+def recover_grading():
+    """Grade every answer still pending from an earlier run, in this process."""
+    from services.grading_queue import grading_queue
+
+    pending = db.session.query(Answer.id).filter(Answer.is_correct.is_(None)).order_by(Answer.id)
+    ids = [answer_id for answer_id, in pending]
+    db.session.remove()
+    graded = 0
+    for offset in range(0, len(ids), app.config['GRADING_BATCH_SIZE']):
+        graded += len(grading_queue.grade(ids[offset:offset + app.config['GRADING_BATCH_SIZE']]))
+    click.echo(f"Graded {graded} of {len(ids)} pending answers.")
+
+@app.cli.command('export-answers')
+@click.option('--output', default='-', show_default=True, help='File to write, or - for stdout.')
+@click.option('--format', 'export_format', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True,
+              help='NDJSON, or gzip-compressed CSV.')
+@click.option('--user-id', type=int, default=None, help='Only this user (default: everyone).')
+@click.option('--subject-id', type=int, default=None)
+@click.option('--start', type=click.DateTime(), default=None, help='Earliest answer time, inclusive.')
+@click.option('--end', type=click.DateTime(), default=None, help='Latest answer time, exclusive.')
+@click.option('--cursor', default=None, help='Resume after the row carrying this cursor.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows fetched per round trip.')
+def export_answers(output, export_format, user_id, subject_id, start, end, cursor, batch_size):
+    """Stream answer history joined with question text and subject name, in constant memory."""
+    from services import answer_export
+    from services.cursors import decode_cursor
+
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    statement = answer_export.export_query(user_id, start, end, subject_id, after)
+    partitions = answer_export.stream_rows(db.session, statement, batch_size)
+    chunks = answer_export.csv_gzip_chunks(partitions) if export_format == 'csv' else answer_export.ndjson_chunks(partitions)
+    with click.open_file(output, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+@app.cli.command('archive-answers')
+@click.option('--horizon-days', default=None, type=int, help='Archive graded answers older than this (defaults to ARCHIVE_HORIZON_DAYS).')
+@click.option('--directory', default=None, help='Where to write archive files (defaults to ARCHIVE_DIR).')
+@click.option('--batch-size', default=1000, show_default=True, help='Answers per file and per transaction.')
+@click.option('--max-batches', default=None, type=int, help='Stop after this many batches.')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between batches.')
+@click.option('--dry-run', is_flag=True, help='Only count the answers that would be archived.')
+def archive_answers(horizon_days, directory, batch_size, max_batches, pause, dry_run):
+    """Move old answers into gzip-NDJSON files, keeping their totals for the dashboard.
+
+    Archived answers stop counting for question reuse and idempotency keys, and the mastery,
+    review and IRT rebuilds refuse to run until they are restored (or are told --live-only).
+    """
+    from services import answer_archive
+    from datetime import datetime, timedelta
+
+    horizon_days = app.config['ARCHIVE_HORIZON_DAYS'] if horizon_days is None else horizon_days
+    directory = directory or app.config['ARCHIVE_DIR']
+    before = datetime.utcnow() - timedelta(days=horizon_days)
+    if dry_run:
+        click.echo(f"{answer_archive.eligible(before)} graded answers are older than {horizon_days} days.")
+        return
+    archived, files = answer_archive.archive(directory, before, batch_size, max_batches, pause)
+    click.echo(f"Archived {archived} answers older than {horizon_days} days into {files} files under {directory}.")
+
+@app.cli.command('restore-answers')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option('--all', 'restore_all', is_flag=True, help='Restore every file under ARCHIVE_DIR.')
+@click.option('--batch-size', default=1000, show_default=True, help='Answers inserted per transaction.')
+def restore_answers(paths, restore_all, batch_size):
+    """Bring archived answers back into the Answer table.
+
+    Restored answers are still past the horizon, so raise ARCHIVE_HORIZON_DAYS (or stop
+    scheduling archive-answers) first if they should stay.
+    """
+    from services import answer_archive
+
+    if restore_all:
+        paths = answer_archive.archive_files(app.config['ARCHIVE_DIR'])
+    if not paths:
+        raise SystemExit("No archive files given.")
+    for path in paths:
+        restored, skipped = answer_archive.restore(path, batch_size)
+        click.echo(f"{path}: restored {restored} answers, skipped {skipped} already present or orphaned.")
@@ -10,6 +10,15 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', 'your-api-key')
 
+    # Database engine; DB_PROFILE is 'pooled', 'serverless' or 'sqlite', picked from the URI and SERVERLESS when unset
+    DB_PROFILE = os.environ.get('DB_PROFILE')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free pooled connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # Seconds; keep below the server's idle timeout
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 10))  # Seconds
+    DB_SLOW_CHECKOUT = float(os.environ.get('DB_SLOW_CHECKOUT', 0.1))  # Checkouts slower than this many seconds are counted
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
@@ -30,3 +39,65 @@ config = {
     'testing': TestingConfig,
     'default': DevelopmentConfig
 }
+
+class PooledEngine:
+    """Long-running servers: a bounded pool of persistent connections, pinged on checkout and recycled before idle timeouts."""
+    POOL = 'queue'
+    PRAGMAS = {}
+
+    @staticmethod
+    def engine_options(settings):
+        return {
+            'pool_size': settings['DB_POOL_SIZE'],
+            'max_overflow': settings['DB_MAX_OVERFLOW'],
+            'pool_timeout': settings['DB_POOL_TIMEOUT'],
+            'pool_recycle': settings['DB_POOL_RECYCLE'],
+            'pool_pre_ping': True,
+            'connect_args': {'connect_timeout': settings['DB_CONNECT_TIMEOUT']}
+        }
+
+class ServerlessEngine:
+    """Serverless functions: no pool, so a frozen instance holds no connections and PgBouncer does the pooling."""
+    POOL = 'null'
+    PRAGMAS = {}
+
+    @staticmethod
+    def engine_options(settings):
+        # A fresh connection per checkout cannot be stale, so pre-ping and recycle would only add round trips
+        return {'connect_args': {'connect_timeout': settings['DB_CONNECT_TIMEOUT']}}
+
+class SQLiteEngine:
+    """Local SQLite files: WAL so readers do not block the writer, with a busy timeout instead of instant lock errors."""
+    POOL = 'queue'
+    PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # Durable at checkpoints, which is enough in WAL mode
+        'foreign_keys': 'ON',
+        'busy_timeout': 5000,  # Milliseconds
+        'cache_size': -20000,  # KiB
+        'temp_store': 'MEMORY'
+    }
+
+    @staticmethod
+    def engine_options(settings):
+        return {
+            'pool_size': settings['DB_POOL_SIZE'],
+            'max_overflow': settings['DB_MAX_OVERFLOW'],
+            'pool_timeout': settings['DB_POOL_TIMEOUT'],
+            # The pool hands each connection to one thread at a time
+            'connect_args': {'check_same_thread': False}
+        }
+
+engine_profiles = {
+    'pooled': PooledEngine,
+    'serverless': ServerlessEngine,
+    'sqlite': SQLiteEngine
+}
+
+def engine_profile_name(settings):
+    """The configured DB_PROFILE, or the one that suits the database URI and deployment mode."""
+    if settings.get('DB_PROFILE'):
+        return settings['DB_PROFILE']
+    if settings['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return 'sqlite'
+    return 'serverless' if settings.get('SERVERLESS') else 'pooled'
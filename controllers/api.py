@@ -1,8 +1,14 @@
 from flask import Blueprint, jsonify, request, current_app
 from flask_login import login_required, current_user
 from app import db
-import google.generativeai as genai
 import json
+from services.question_pool import question_pool
+from services.grading_cache import grading_cache
+from services.grading_queue import grading_queue
+from services.question_serializer import question_serializer
+from services.llm import llm
+from services.user_cache import user_cache
+from services.db_pool import pool_metrics
 
 api = Blueprint('api', __name__)
 
@@ -10,23 +16,19 @@ api = Blueprint('api', __name__)
 @login_required
 def test_gemini():
     """Test the Gemini API configuration."""
-    api_key = current_app.config.get('GEMINI_API_KEY')
-    
-    if not api_key or api_key == 'your-api-key':
+    if not llm.available:
         return jsonify({
             'status': 'error',
             'message': 'No API key configured. Please add your Gemini API key to the .env file.'
         }), 400
     
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-flash')
-        response = model.generate_content("Respond with 'API connection successful' if you receive this message.")
+        response_text = llm.generate("Respond with 'API connection successful' if you receive this message.")
         
         return jsonify({
             'status': 'success',
-            'message': response.text,
-            'model': 'gemini-flash'
+            'message': response_text,
+            'model': current_app.config['LLM_MODEL']
         })
     except Exception as e:
         return jsonify({
@@ -53,3 +55,45 @@ def toggle_preference():
     
     db.session.commit()
     return jsonify({'status': 'success', 'message': f'{preference} updated'})
+
+@api.route('/pool-stats', methods=['GET'])
+@login_required
+def pool_stats():
+    """Question pool hit/miss and refill-lag counters."""
+    return jsonify(question_pool.stats())
+
+@api.route('/grading-cache-stats', methods=['GET'])
+@login_required
+def grading_cache_stats():
+    """Free-recall verdict cache hit rate and counters."""
+    return jsonify(grading_cache.stats())
+
+@api.route('/grading-queue-stats', methods=['GET'])
+@login_required
+def grading_queue_stats():
+    """Background grading queue depth, batch size and recovery counters."""
+    return jsonify(grading_queue.stats())
+
+@api.route('/question-payload-stats', methods=['GET'])
+@login_required
+def question_payload_stats():
+    """Serialized question payload cache hit rate and the JSON encoder in use."""
+    return jsonify(question_serializer.stats())
+
+@api.route('/llm-stats', methods=['GET'])
+@login_required
+def llm_stats():
+    """Model call latency, token, retry and circuit breaker counters."""
+    return jsonify(llm.stats())
+
+@api.route('/user-cache-stats', methods=['GET'])
+@login_required
+def user_cache_stats():
+    """Session loader cache hit rate and invalidation counters."""
+    return jsonify(user_cache.stats())
+
+@api.route('/db-pool-stats', methods=['GET'])
+@login_required
+def db_pool_stats():
+    """Engine profile, connection checkout wait and connection churn counters."""
+    return jsonify(pool_metrics.stats(db.engine))
@@ -4,6 +4,7 @@ from app import db, bcrypt
 from models.user import User
 from werkzeug.urls import url_parse
 from datetime import datetime
+from services.instrumentation import request_metrics
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, BooleanField, SubmitField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError
@@ -41,7 +42,8 @@ def register():
     
     form = RegistrationForm()
     if form.validate_on_submit():
-        hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
+        with request_metrics.timed('bcrypt'):
+            hashed_password = bcrypt.generate_password_hash(form.password.data).decode('utf-8')
         user = User(username=form.username.data, email=form.email.data, password=hashed_password)
         db.session.add(user)
         db.session.commit()
@@ -58,7 +60,9 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
-        if user and bcrypt.check_password_hash(user.password, form.password.data):
+        with request_metrics.timed('bcrypt'):
+            password_ok = user is not None and bcrypt.check_password_hash(user.password, form.password.data)
+        if password_ok:
             login_user(user, remember=form.remember.data)
             user.last_login = datetime.utcnow()
             db.session.commit()
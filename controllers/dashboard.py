@@ -1,11 +1,15 @@
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, Response, stream_with_context
 from flask_login import login_required, current_user
 from app import db
 from models.answer import Answer
 from models.question import Question
 from models.subject import Subject
-from sqlalchemy import func
-import json
+from models.daily_rollup import DailyRollup
+from models.difficulty_rollup import DifficultyRollup
+from services.response_cache import response_cache
+from sqlalchemy import tuple_
+from services.cursors import encode_cursor, decode_cursor
+from services import answer_export
 from datetime import datetime, timedelta
 
 dashboard = Blueprint('dashboard', __name__)
@@ -18,60 +22,50 @@ def index():
 
 @dashboard.route('/stats')
 @login_required
+@response_cache.cached
 def get_stats():
     """API endpoint to get user statistics."""
-    # Get total questions answered
-    total_answers = Answer.query.filter_by(user_id=current_user.id).count()
+    # Served from the rollup tables: one row per subject per active day, one per difficulty level
+    daily_query, difficulty_query = stats_queries(current_user.id)
+    daily_rows = daily_query.all()
+    difficulty_rows = difficulty_query.all()
     
-    # Get correct answers
-    correct_answers = Answer.query.filter_by(user_id=current_user.id, is_correct=True).count()
+    # Get total questions answered, correct answers and average response time
+    total_answers = sum(row.total for row in daily_rows)
+    correct_answers = sum(row.correct for row in daily_rows)
+    response_time_sum = sum(row.response_time_sum for row in daily_rows)
     
     # Calculate accuracy
     accuracy = (correct_answers / total_answers * 100) if total_answers > 0 else 0
-    
-    # Get average response time
-    avg_response_time_query = db.session.query(func.avg(Answer.response_time)).filter_by(user_id=current_user.id)
-    avg_response_time = avg_response_time_query.scalar() or 0
+    avg_response_time = response_time_sum / total_answers if total_answers > 0 else 0
     
     # Get questions by difficulty
-    difficulty_distribution = db.session.query(
-        Answer.difficulty_at_time,
-        func.count(Answer.id)
-    ).filter_by(user_id=current_user.id).group_by(Answer.difficulty_at_time).all()
+    difficulty_data = {level: count for level, count in difficulty_rows if count}
     
-    difficulty_data = {level: count for level, count in difficulty_distribution}
-    
-    # Get performance by subject
-    subject_performance = db.session.query(
-        Subject.name,
-        func.count(Answer.id).label('total'),
-        func.sum(Answer.is_correct.cast(db.Integer)).label('correct')
-    ).join(Question, Answer.question_id == Question.id)\
-     .join(Subject, Question.subject_id == Subject.id)\
-     .filter(Answer.user_id == current_user.id)\
-     .group_by(Subject.name).all()
+    # Get performance by subject and improvement over time (last 30 days)
+    thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).date()
+    by_subject = {}
+    by_day = {}
+    for day, name, total, correct, _ in daily_rows:
+        subject_totals = by_subject.setdefault(name, [0, 0])
+        subject_totals[0] += total
+        subject_totals[1] += correct
+        if day >= thirty_days_ago:
+            day_totals = by_day.setdefault(day, [0, 0])
+            day_totals[0] += total
+            day_totals[1] += correct
     
     subject_data = [{
         'name': name,
         'total': total,
         'correct': correct,
         'accuracy': (correct / total * 100) if total > 0 else 0
-    } for name, total, correct in subject_performance]
-    
-    # Get improvement over time (last 30 days)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    
-    daily_performance = db.session.query(
-        func.date(Answer.created_at).label('date'),
-        func.count(Answer.id).label('total'),
-        func.sum(Answer.is_correct.cast(db.Integer)).label('correct')
-    ).filter(Answer.user_id == current_user.id, Answer.created_at >= thirty_days_ago)\
-     .group_by(func.date(Answer.created_at)).all()
+    } for name, (total, correct) in sorted(by_subject.items())]
     
     time_series_data = [{
-        'date': date.strftime('%Y-%m-%d'),
+        'date': day.strftime('%Y-%m-%d'),
         'accuracy': (correct / total * 100) if total > 0 else 0
-    } for date, total, correct in daily_performance]
+    } for day, (total, correct) in sorted(by_day.items())]
     
     # Return all stats as JSON
     return jsonify({
@@ -84,25 +78,127 @@ def get_stats():
         'time_series': time_series_data
     })
 
+def stats_queries(user_id):
+    """The two rollup reads behind get_stats."""
+    daily_query = db.session.query(
+        DailyRollup.day,
+        Subject.name,
+        DailyRollup.total,
+        DailyRollup.correct,
+        DailyRollup.response_time_sum
+    ).join(Subject, DailyRollup.subject_id == Subject.id)\
+     .filter(DailyRollup.user_id == user_id)
+    
+    difficulty_query = db.session.query(
+        DifficultyRollup.difficulty,
+        DifficultyRollup.total
+    ).filter(DifficultyRollup.user_id == user_id)
+    
+    return daily_query, difficulty_query
+
 @dashboard.route('/recent-activity')
 @login_required
+@response_cache.cached
 def recent_activity():
     """API endpoint to get user's recent activity."""
-    recent_answers = Answer.query.filter_by(user_id=current_user.id)\
-        .order_by(Answer.created_at.desc()).limit(10).all()
-    
-    activity_data = []
-    for answer in recent_answers:
-        question = Question.query.get(answer.question_id)
-        subject = Subject.query.get(question.subject_id)
-        
-        activity_data.append({
-            'question_text': question.text,
-            'subject': subject.name,
-            'is_correct': answer.is_correct,
-            'date': answer.created_at.strftime('%Y-%m-%d %H:%M'),
-            'difficulty': answer.difficulty_at_time,
-            'response_time': answer.response_time
+    activity_data, _ = _activity_page(current_user.id, 10)
+    return jsonify(activity_data)
+
+@dashboard.route('/activity')
+@login_required
+@response_cache.cached
+def activity_history():
+    """API endpoint to page through the user's full answer history, newest first."""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    cursor = request.args.get('cursor')
+    
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    activity_data, next_cursor = _activity_page(current_user.id, limit, after)
+    return jsonify({'items': activity_data, 'next_cursor': next_cursor})
+
+def _activity_page(user_id, limit, after=None):
+    """One page of activity rows in a single joined query, plus the cursor for the next page."""
+    rows = activity_query(user_id, after).limit(limit + 1).all()
+    
+    activity_data = [{
+        'question_text': row.text,
+        'subject': row.name,
+        'is_correct': row.is_correct,
+        'date': row.created_at.strftime('%Y-%m-%d %H:%M'),
+        'difficulty': row.difficulty_at_time,
+        'response_time': row.response_time
+    } for row in rows[:limit]]
+    
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return activity_data, next_cursor
+
+@dashboard.route('/export')
+@login_required
+def export_history():
+    """Stream the user's full answer history as NDJSON or gzip CSV, oldest first.
+    
+    Optional start (inclusive) and end (exclusive) ISO dates, subject_id, and a cursor taken from
+    the last row received to resume an interrupted export.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    
+    try:
+        start = _parse_datetime(request.args.get('start'))
+        end = _parse_datetime(request.args.get('end'))
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    statement = answer_export.export_query(current_user.id, start, end, request.args.get('subject_id', type=int), after)
+    partitions = answer_export.stream_rows(db.session, statement)
+    
+    if export_format == 'csv':
+        return Response(stream_with_context(answer_export.csv_gzip_chunks(partitions)), mimetype='application/gzip', headers={
+            'Content-Disposition': 'attachment; filename="answers.csv.gz"',
+            'X-Accel-Buffering': 'no'
         })
+    return Response(stream_with_context(answer_export.ndjson_chunks(partitions)), mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename="answers.ndjson"',
+        'X-Accel-Buffering': 'no'
+    })
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f'Invalid date: {value}') from e
+
+def activity_query(user_id, after=None):
+    """Answer history joined with question text and subject name, newest first.
     
-    return jsonify(activity_data)
+    Keyset pagination on (created_at, id) keeps each page an index range scan however deep it is.
+    """
+    query = db.session.query(
+        Answer.id,
+        Answer.created_at,
+        Answer.is_correct,
+        Answer.difficulty_at_time,
+        Answer.response_time,
+        Question.text,
+        Subject.name
+    ).join(Question, Answer.question_id == Question.id)\
+     .join(Subject, Question.subject_id == Subject.id)\
+     .filter(Answer.user_id == user_id)
+    
+    if after:
+        created_at, answer_id = after
+        # Row-value comparison so the index seeks straight to the cursor position
+        query = query.filter(tuple_(Answer.created_at, Answer.id) < tuple_(created_at, answer_id))
+    
+    return query.order_by(Answer.created_at.desc(), Answer.id.desc())
@@ -1,16 +1,35 @@
-from flask import Blueprint, render_template, request, jsonify, current_app, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, current_app, flash, redirect, url_for, Response, stream_with_context, session
 from flask_login import login_required, current_user
 from app import db
 from models.subject import Subject
 from models.question import Question
 from models.answer import Answer
-import google.generativeai as genai
+from models.mastery import Mastery
+from models.review_state import ReviewState
+from models.user import User
+from services.question_generation import build_question_prompt, parse_question, question_from_data, mock_question_data, save_questions, GeminiGenerator
+from services.question_pool import question_pool
+from services.question_serializer import question_serializer, variant_for, json_response, list_response
+from services.grading_cache import grading_cache
+from services.grading_queue import grading_queue
+from services.user_cache import user_cache
+from services.local_grader import grade_question_locally
+from services.llm import llm, LLMUnavailable
+from services.answer_grading import build_grading_prompt, grade_free_recall
+from services import rollups
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timezone
 import json
 import time
 import os
+import random
 
 learning = Blueprint('learning', __name__)
 
+# Cap on question IDs remembered in the session cookie, across all subjects: about 1 KB of a 4 KB cookie
+SESSION_SERVED_LIMIT = 200
+
 @learning.route('/subject-selection')
 @login_required
 def subject_selection():
@@ -54,114 +73,125 @@ def generate_question(subject_id):
     """API endpoint to generate a new question."""
     subject = Subject.query.get_or_404(subject_id)
     
-    # Calculate appropriate difficulty level based on user's past performance
-    user_answers = Answer.query.filter_by(user_id=current_user.id).all()
+    # Difficulty comes from the maintained per-subject mastery aggregate (level 1 if none yet)
+    mastery = Mastery.query.filter_by(user_id=current_user.id, subject_id=subject_id).first()
+    difficulty = mastery.difficulty if mastery else 1
     
-    # Default to difficulty level 1 if no previous answers
-    difficulty = 1
+    # Reuse a stored question this user has not answered before paying for a new one
+    if random.random() < current_app.config['QUESTION_REUSE_RATIO']:
+        stored = None
+        if mastery and mastery.irt_ability is not None:
+            # Calibrated: aim for the configured predicted success rate rather than the nominal level
+            stored = Question.find_targeted(current_user.id, subject_id, mastery.irt_ability, current_app.config['IRT_TARGET_SUCCESS'])
+        if stored is None:
+            stored = Question.find_unanswered(current_user.id, subject_id, difficulty, current_app.config['QUESTION_REUSE_BAND'])
+        if stored:
+            return json_response(question_serializer.encoded(stored, _variant()))
     
-    if user_answers:
-        # Simple algorithm: average correct answers increases difficulty
-        correct_answers = [a for a in user_answers if a.is_correct]
-        accuracy = len(correct_answers) / len(user_answers)
-        
-        # Adjust difficulty based on accuracy (0.9+ accuracy → increase difficulty)
-        if accuracy > 0.9 and len(user_answers) >= 10:
-            difficulty = min(10, difficulty + 1)
-        elif accuracy < 0.6 and difficulty > 1:
-            difficulty = max(1, difficulty - 1)
-    
-    # Configure Gemini
-    api_key = current_app.config.get('GEMINI_API_KEY')
-    if not api_key or api_key == 'your-api-key':
+    # Serve a pre-generated question when the pool has one ready
+    pooled = question_pool.pop(subject_id, difficulty)
+    if pooled:
+        return json_response(question_serializer.pooled(pooled, difficulty, _variant())[1])
+    
+    if not llm.available:
         # For development/testing, return a mock question
-        mock_question = {
-            'text': f"This is a sample question about {subject.name} at difficulty level {difficulty}.",
-            'options': {
-                'a': 'First option',
-                'b': 'Second option',
-                'c': 'Third option',
-                'd': 'Fourth option (correct)'
-            },
-            'correct_option': 'd',
-            'explanation': 'This is a sample explanation for the correct answer.'
-        }
-        return jsonify(mock_question)
-    
-    # Set up Gemini API
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-flash')
-    
-    # Generate prompt based on difficulty and subject
-    prompt = f"""
-    Generate a question about {subject.name} at difficulty level {difficulty}/10.
-    
-    If difficulty is 1-3: Focus on basic recall, definitions, and simple concepts.
-    If difficulty is 4-6: Focus on application and understanding of concepts.
-    If difficulty is 7-10: Focus on analysis, evaluation, and synthesis of complex concepts.
-    
-    Format your response as a valid JSON object with the following structure:
-    {{
-        "text": "The question text",
-        "options": {{
-            "a": "First option",
-            "b": "Second option",
-            "c": "Third option",
-            "d": "Fourth option"
-        }},
-        "correct_option": "The correct option letter (a, b, c, or d)",
-        "explanation": "Detailed explanation of why the answer is correct"
-    }}
-    
-    The question should be challenging but fair for the given difficulty level.
-    """
+        return jsonify(mock_question_data(subject.name, difficulty))
     
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text
-        
-        # Extract JSON from response
-        json_str = response_text.strip()
-        if '```json' in json_str:
-            json_str = json_str.split('```json')[1].split('```')[0].strip()
-        
-        question_data = json.loads(json_str)
+        question_data = parse_question(llm.generate(build_question_prompt(subject.name, difficulty)))
         
         # Save question to database
-        new_question = Question(
-            text=question_data['text'],
-            answer=question_data['correct_option'],
-            explanation=question_data['explanation'],
-            difficulty=difficulty,
-            subject_id=subject_id,
-            option_a=question_data['options']['a'],
-            option_b=question_data['options']['b'],
-            option_c=question_data['options']['c'],
-            option_d=question_data['options']['d'],
-            correct_option=question_data['correct_option']
-        )
+        new_question = question_from_data(question_data, subject_id, difficulty)
         db.session.add(new_question)
         db.session.commit()
         
         # Return question data without correct answer for the frontend
-        if current_user.question_mode == 'multiple_choice':
-            return jsonify({
-                'id': new_question.id,
-                'text': new_question.text,
-                'options': question_data['options'],
-                'difficulty': difficulty
-            })
-        else:
-            # Free recall mode: no options
-            return jsonify({
-                'id': new_question.id,
-                'text': new_question.text,
-                'difficulty': difficulty
-            })
+        return json_response(question_serializer.encoded(new_question, _variant()))
             
+    except LLMUnavailable:
+        # Upstream is failing: serve the mock question rather than queueing behind it
+        return jsonify(mock_question_data(subject.name, difficulty))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@learning.route('/session/<int:subject_id>/questions')
+@login_required
+def session_questions(subject_id):
+    """API endpoint returning the next few questions for a study session in one response.
+    
+    Questions handed out earlier in this session are not repeated until answered. Pre-generated
+    questions from the pool come first, then stored ones; the pool (or, with the pool off, the
+    question bank) is topped up in the background as it drains, so later calls are served without
+    waiting on Gemini.
+    """
+    subject = Subject.query.get_or_404(subject_id)
+    count = min(max(request.args.get('count', current_app.config['SESSION_PREFETCH_SIZE'], type=int), 1),
+                current_app.config['SESSION_PREFETCH_MAX'])
+    
+    mastery = Mastery.query.filter_by(user_id=current_user.id, subject_id=subject_id).first()
+    difficulty = mastery.difficulty if mastery else 1
+    
+    # IDs already handed out live in the session cookie; they are unique across subjects, so one list serves them all
+    served = session.get('served_questions', [])
+    if not isinstance(served, list):
+        served = []  # Cookie from before the list was shared across subjects
+    seen = set(served)
+    
+    # Pre-generated questions first: they are stored too, so taking them here drains the pool and triggers its refill
+    variant = _variant()
+    questions = [question_serializer.pooled(pooled, difficulty, variant)
+                 for pooled in question_pool.take(subject_id, difficulty, count, exclude=seen)]
+    seen.update(payload['id'] for payload, _ in questions)
+    
+    stored = Question.unanswered_query(current_user.id, subject_id, difficulty, current_app.config['QUESTION_REUSE_BAND'])
+    if seen:
+        stored = stored.filter(Question.id.notin_(seen))
+    # Look one batch ahead so the pool is topped up before stored questions actually run out
+    candidates = stored.limit(count * 2).all() if len(questions) < count else []
+    questions += question_serializer.serialize_many(candidates[:count - len(questions)], variant)
+    
+    if len(candidates) < count * 2:
+        # Stored questions are running out at this level: have fresh ones ready for the next call,
+        # in the pool when it is on and in the question bank when it is off
+        question_pool.request_refill(subject_id, difficulty)
+    
+    if not questions and llm.available:
+        # Cold start: nothing stored or pooled yet, so generate this batch in one call
+        try:
+            generator = GeminiGenerator(llm, batch_size=current_app.config['QUESTION_BATCH_SIZE'])
+            questions += question_serializer.serialize_many(save_questions(generator(subject.name, difficulty, count=count), subject_id, difficulty), variant)
+        except LLMUnavailable as e:
+            return jsonify({'error': str(e)}), 503
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    session['served_questions'] = (served + [payload['id'] for payload, _ in questions])[-SESSION_SERVED_LIMIT:]
+    return list_response('questions', [encoded for _, encoded in questions])
+
+def _variant():
+    """Question payload variant for the current user: options only in multiple choice mode, never the correct answer."""
+    return variant_for(current_user.question_mode)
+
+@learning.route('/review-next')
+@login_required
+def review_next():
+    """API endpoint to fetch the most overdue stored question for spaced-repetition review."""
+    subject_id = request.args.get('subject_id', type=int)
+    now = datetime.utcnow()
+    
+    # Head of the queue is the most overdue item; if even that is not due yet, nothing is
+    state = ReviewState.queue_query(current_user.id, subject_id).first()
+    if state is None or state.due_at > now:
+        return jsonify({'next_due_at': state.due_at.isoformat() if state else None})
+    
+    question = db.session.get(Question, state.question_id)
+    return jsonify(dict(question_serializer.payload(question, _variant()), review={
+        'due_at': state.due_at.isoformat(),
+        'overdue_seconds': int((now - state.due_at).total_seconds()),
+        'interval_days': state.interval_days,
+        'repetitions': state.repetitions
+    }))
+
 @learning.route('/submit-answer', methods=['POST'])
 @login_required
 def submit_answer():
@@ -175,36 +205,37 @@ def submit_answer():
     question = Question.query.get_or_404(question_id)
     
     # Evaluate the answer
+    pending = False
     if current_user.question_mode == 'multiple_choice':
         is_correct = user_response.lower() == question.correct_option.lower()
     else:
-        # For free recall, use Gemini to evaluate if available, otherwise exact match
-        api_key = current_app.config.get('GEMINI_API_KEY')
-        if api_key and api_key != 'your-api-key':
-            # Use Gemini to evaluate
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-flash')
-            
-            prompt = f"""
-            Question: {question.text}
-            Correct answer: {question.answer}
-            User answer: {user_response}
-            
-            Is the user's answer correct? Consider semantic meaning, not just exact wording.
-            Respond with only 'Yes' or 'No'.
-            """
-            
-            try:
-                response = model.generate_content(prompt)
-                is_correct = 'yes' in response.text.strip().lower()
-            except Exception:
-                # Fallback to simple comparison
+        # Settle clear matches and clear mistakes locally; everything else goes to Gemini
+        is_correct = grade_question_locally(question, user_response)
+        
+        if is_correct is None:
+            # For free recall, use Gemini to evaluate if available, otherwise exact match
+            if llm.available:
+                # Same question and equivalent wording as an earlier submission: reuse its verdict
+                cached_verdict = grading_cache.get(question, user_response)
+                if cached_verdict is not None:
+                    is_correct = cached_verdict
+                elif grading_queue.enabled:
+                    # Store the answer as pending now and let a grading worker judge it
+                    pending = True
+                else:
+                    # Use Gemini to evaluate
+                    try:
+                        is_correct = 'yes' in llm.generate(build_grading_prompt(question, user_response)).strip().lower()
+                        grading_cache.put(question, user_response, is_correct)
+                    except Exception:
+                        # Fallback to simple comparison
+                        is_correct = user_response.lower() == question.answer.lower()
+            else:
+                # Simple exact match
                 is_correct = user_response.lower() == question.answer.lower()
-        else:
-            # Simple exact match
-            is_correct = user_response.lower() == question.answer.lower()
     
     # Save answer to database
+    answered_at = datetime.utcnow()
     new_answer = Answer(
         user_id=current_user.id,
         question_id=question_id,
@@ -212,12 +243,238 @@ def submit_answer():
         is_correct=is_correct,
         response_time=response_time,
         mode=current_user.question_mode,
-        difficulty_at_time=question.difficulty
+        difficulty_at_time=question.difficulty,
+        created_at=answered_at
     )
     db.session.add(new_answer)
+    
+    if pending:
+        # Mastery, review state and rollups are updated by the worker once there is a verdict
+        current_user.stats_version = User.stats_version + 1
+        db.session.commit()
+        grading_queue.submit(new_answer.id)
+        return jsonify(_pending_result(new_answer.id)), 202
+    
+    # Keep the mastery aggregate and review schedule in step with the answer log in the same transaction
+    mastery = Mastery.for_update(current_user.id, question.subject_id)
+    mastery.record(is_correct, current_app.config['MASTERY_WINDOW'])
+    ReviewState.for_update(current_user.id, question_id).schedule(ReviewState.quality(is_correct, response_time), answered_at)
+    rollups.record_answer(current_user.id, question.subject_id, question.difficulty, is_correct, response_time, answered_at)
+    
+    # Invalidate cached dashboard responses (incremented in SQL so concurrent submits both count)
+    current_user.stats_version = User.stats_version + 1
     db.session.commit()
     
     # Return result with explanation if enabled
+    return jsonify(_answer_result(question, is_correct))
+
+@learning.route('/answers/<int:answer_id>')
+@login_required
+def answer_status(answer_id):
+    """API endpoint to poll for the verdict on an answer stored as pending by submit_answer."""
+    answer = Answer.query.filter_by(id=answer_id, user_id=current_user.id).first_or_404()
+    if answer.is_correct is None:
+        return jsonify(_pending_result(answer.id))
+    
+    # The worker bumped stats_version: make this browser's next request reload the user everywhere
+    user_cache.invalidate(current_user.id)
+    return jsonify(dict(_answer_result(answer.question, answer.is_correct), status='graded', answer_id=answer.id))
+
+@learning.route('/answers/<int:answer_id>/events')
+@login_required
+def answer_events(answer_id):
+    """Server-Sent Events variant of answer_status that sends one 'graded' event once the verdict is in."""
+    Answer.query.filter_by(id=answer_id, user_id=current_user.id).first_or_404()
+    user_id = current_user.id
+    # Rotate this browser's cache revision now: the session cookie goes out with the headers, before any verdict
+    user_cache.invalidate(user_id)
+    timeout = current_app.config['GRADING_EVENTS_TIMEOUT']
+    
+    def events():
+        yield ': stream open\n\n'
+        deadline = time.monotonic() + timeout
+        while True:
+            # Graded in this process wakes us at once; the periodic re-read covers other processes
+            graded = db.session.get(Answer, answer_id)
+            result = None if graded.is_correct is None else dict(_answer_result(graded.question, graded.is_correct), answer_id=answer_id)
+            # Do not hold a pooled connection while waiting
+            db.session.remove()
+            if result is not None:
+                # Drop anything cached from requests made while the stream was open
+                user_cache.invalidate(user_id)
+                yield _sse('graded', result)
+                return
+            if time.monotonic() >= deadline:
+                yield _sse('timeout', _pending_result(answer_id))
+                return
+            yield ': pending\n\n'
+            grading_queue.wait(answer_id, min(1.0, max(0, deadline - time.monotonic())))
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def _pending_result(answer_id):
+    return {
+        'status': 'pending',
+        'answer_id': answer_id,
+        'is_correct': None,
+        'poll_url': url_for('learning.answer_status', answer_id=answer_id),
+        'events_url': url_for('learning.answer_events', answer_id=answer_id)
+    }
+
+@learning.route('/submit-answers', methods=['POST'])
+@login_required
+def submit_answers():
+    """API endpoint to grade and store a batch of answers, e.g. a session synced from an offline client.
+    
+    Each item is {question_id, user_response, response_time, answered_at?, idempotency_key?}.
+    Items already stored under their idempotency key are reported as recorded instead of being
+    counted again, so a retried sync is safe. Results come back per item, in request order.
+    """
+    data = request.get_json(silent=True)
+    items = data.get('answers') if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return jsonify({'error': 'Expected a JSON object with an "answers" list'}), 400
+    
+    limit = current_app.config['BULK_ANSWER_LIMIT']
+    if len(items) > limit:
+        return jsonify({'error': f'At most {limit} answers per request'}), 413
+    
+    try:
+        results = _submit_answer_batch(items)
+    except IntegrityError:
+        # A concurrent retry stored some of the same keys first: run again so they come back as duplicates
+        db.session.rollback()
+        results = _submit_answer_batch(items)
+    return jsonify({'results': results})
+
+def _submit_answer_batch(items):
+    now = datetime.utcnow()
+    results = [None] * len(items)
+    
+    entries = []
+    seen_keys = set()
+    for index, item in enumerate(items):
+        entry, error = _parse_batch_item(item, now)
+        if entry and entry['idempotency_key'] in seen_keys:
+            entry, error = None, 'Duplicate idempotency_key in batch'
+        if error:
+            results[index] = {'status': 'error', 'error': error}
+            continue
+        if entry['idempotency_key']:
+            seen_keys.add(entry['idempotency_key'])
+        entries.append((index, entry))
+    
+    # One query each for the questions involved and for keys stored by an earlier attempt
+    question_ids = {entry['question_id'] for _, entry in entries}
+    questions = {question.id: question for question in Question.query.filter(Question.id.in_(question_ids))} if question_ids else {}
+    stored = {}
+    if seen_keys:
+        stored = {
+            answer.idempotency_key: answer
+            for answer in Answer.query.filter(Answer.user_id == current_user.id, Answer.idempotency_key.in_(seen_keys))
+        }
+    
+    pending = []
+    for index, entry in entries:
+        question = questions.get(entry['question_id'])
+        if question is None:
+            results[index] = {'status': 'error', 'error': 'Question not found'}
+        elif entry['idempotency_key'] in stored:
+            results[index] = dict(_answer_result(question, stored[entry['idempotency_key']].is_correct), status='duplicate')
+        else:
+            pending.append((index, entry, question))
+    
+    if not pending:
+        return results
+    
+    verdicts = _grade_batch([(question, entry['user_response']) for _, entry, question in pending])
+    
+    # Apply in the order the answers were given so mastery and review state replay correctly
+    graded = sorted(zip(pending, verdicts), key=lambda graded_item: graded_item[0][1]['answered_at'])
+    masteries = Mastery.for_update_many(current_user.id, [question.subject_id for _, _, question in pending])
+    reviews = ReviewState.for_update_many(current_user.id, [question.id for _, _, question in pending])
+    window = current_app.config['MASTERY_WINDOW']
+    
+    answers = []
+    for (index, entry, question), is_correct in graded:
+        answers.append({
+            'user_id': current_user.id,
+            'question_id': question.id,
+            'user_response': entry['user_response'],
+            'is_correct': is_correct,
+            'response_time': entry['response_time'],
+            'mode': current_user.question_mode,
+            'difficulty_at_time': question.difficulty,
+            'created_at': entry['answered_at'],
+            'idempotency_key': entry['idempotency_key']
+        })
+        masteries[question.subject_id].record(is_correct, window)
+        reviews[question.id].schedule(ReviewState.quality(is_correct, entry['response_time']), entry['answered_at'])
+        results[index] = dict(_answer_result(question, is_correct), status='created')
+    
+    # One multi-row INSERT; the new IDs are not needed
+    db.session.execute(insert(Answer), answers)
+    rollups.record_answers(current_user.id, [
+        (question.subject_id, question.difficulty, is_correct, entry['response_time'], entry['answered_at'])
+        for (_, entry, question), is_correct in graded
+    ])
+    current_user.stats_version = User.stats_version + 1
+    db.session.commit()
+    return results
+
+def _parse_batch_item(item, now):
+    """Validated fields of one bulk answer item, or an error message."""
+    if not isinstance(item, dict):
+        return None, 'Expected an object'
+    
+    question_id = item.get('question_id')
+    user_response = item.get('user_response')
+    response_time = item.get('response_time')
+    idempotency_key = item.get('idempotency_key')
+    if not isinstance(question_id, int) or isinstance(question_id, bool):
+        return None, 'question_id must be an integer'
+    if not isinstance(user_response, str) or not user_response.strip():
+        return None, 'user_response is required'
+    if not isinstance(response_time, (int, float)) or isinstance(response_time, bool) or response_time < 0:
+        return None, 'response_time must be a non-negative number of seconds'
+    if idempotency_key is not None and (not isinstance(idempotency_key, str) or not 0 < len(idempotency_key) <= 64):
+        return None, 'idempotency_key must be a string of 1-64 characters'
+    
+    # Offline clients report when each answer was given; it must not be in the future
+    answered_at = now
+    if item.get('answered_at') is not None:
+        try:
+            answered_at = datetime.fromisoformat(str(item['answered_at']).replace('Z', '+00:00'))
+        except ValueError:
+            return None, 'answered_at must be an ISO 8601 timestamp'
+        if answered_at.tzinfo is not None:
+            answered_at = answered_at.astimezone(timezone.utc).replace(tzinfo=None)
+        if answered_at > now:
+            return None, 'answered_at is in the future'
+    
+    return {
+        'question_id': question_id,
+        'user_response': user_response,
+        'response_time': float(response_time),
+        'answered_at': answered_at,
+        'idempotency_key': idempotency_key
+    }, None
+
+def _grade_batch(pairs):
+    """Verdicts for (question, user_response) pairs in the current user's mode.
+    
+    Multiple choice is checked directly; free recall goes through grade_free_recall, which
+    settles what it can locally and sends the rest to Gemini in a single batched call.
+    """
+    if current_user.question_mode == 'multiple_choice':
+        return [user_response.lower() == question.correct_option.lower() for question, user_response in pairs]
+    return grade_free_recall(pairs)
+
+def _answer_result(question, is_correct):
+    """Result JSON for a graded answer, with the explanation if the user wants it."""
     result = {
         'is_correct': is_correct,
         'correct_answer': question.correct_option if current_user.question_mode == 'multiple_choice' else question.answer
@@ -226,7 +483,7 @@ def submit_answer():
     if current_user.display_explanations:
         result['explanation'] = question.explanation
     
-    return jsonify(result)
+    return result
 
 @learning.route('/interactive-question', methods=['POST'])
 @login_required
@@ -242,27 +499,85 @@ def interactive_question():
     question = Question.query.get_or_404(question_id)
     
     # Use Gemini to generate an explanation
-    api_key = current_app.config.get('GEMINI_API_KEY')
-    if not api_key or api_key == 'your-api-key':
+    if not llm.available:
         # Mock response for development/testing
         return jsonify({
-            'response': f"This is a sample explanation for '{user_query}' related to the current question."
+            'response': _mock_explanation(user_query)
         })
     
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-flash')
+        return jsonify({'response': llm.generate(_interactive_prompt(question, user_query))})
         
-        prompt = f"""
+    except LLMUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@learning.route('/interactive-question/stream', methods=['GET', 'POST'])
+@login_required
+def interactive_question_stream():
+    """Server-Sent Events variant of interactive_question that forwards the explanation as it is generated."""
+    if not current_user.interactive_mode:
+        return jsonify({'error': 'Interactive mode is not enabled'}), 400
+    
+    data = request.get_json(silent=True) or request.args
+    question_id = data.get('question_id')
+    user_query = data.get('user_query')
+    
+    question = Question.query.get_or_404(question_id)
+    prompt = _interactive_prompt(question, user_query)
+    mock_delay = current_app.config['MOCK_STREAM_DELAY']
+    
+    def events():
+        chunks = []
+        source = None
+        completed = False
+        try:
+            # Send something immediately so headers and the first byte go out before the model answers
+            yield ': stream open\n\n'
+            
+            if not llm.available:
+                # Mock stream for development/testing
+                source = _mock_explanation_chunks(user_query, mock_delay)
+            else:
+                source = llm.stream(prompt)
+            
+            for text in source:
+                chunks.append(text)
+                yield _sse('chunk', {'text': text})
+            
+            completed = True
+            yield _sse('done', {'response': ''.join(chunks)})
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+        finally:
+            # Client went away (GeneratorExit) or generation failed: closing the source cancels upstream
+            if not completed and source is not None:
+                source.close()
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def _interactive_prompt(question, user_query):
+    return f"""
         Original question: {question.text}
         User follow-up query: {user_query}
         
         Provide a clear, educational explanation for the user's query in the context of the original question. 
         Give a step-by-step explanation if appropriate. Be thorough but concise.
         """
-        
-        response = model.generate_content(prompt)
-        return jsonify({'response': response.text})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+
+def _mock_explanation(user_query):
+    return f"This is a sample explanation for '{user_query}' related to the current question."
+
+def _mock_explanation_chunks(user_query, delay):
+    """Yield the mock explanation word by word, paced like a model stream."""
+    for index, word in enumerate(_mock_explanation(user_query).split(' ')):
+        if delay:
+            time.sleep(delay)
+        yield word if index == 0 else ' ' + word
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
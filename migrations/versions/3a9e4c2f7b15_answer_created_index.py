@@ -0,0 +1,26 @@
+"""Answer created_at index
+
+Revision ID: 3a9e4c2f7b15
+Revises: 8d3f0b6c1e27
+Create Date: 2026-10-16 21:52:47.103926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9e4c2f7b15'
+down_revision = '8d3f0b6c1e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.create_index('ix_answer_created', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.drop_index('ix_answer_created')
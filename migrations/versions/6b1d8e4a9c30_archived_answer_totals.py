@@ -0,0 +1,48 @@
+"""Archived answer totals
+
+Revision ID: 6b1d8e4a9c30
+Revises: 3a9e4c2f7b15
+Create Date: 2026-10-16 22:05:31.226817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1d8e4a9c30'
+down_revision = '3a9e4c2f7b15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_daily_total',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('correct', sa.Integer(), nullable=False),
+    sa.Column('response_time_sum', sa.Float(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('subject_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['subject_id'], ['subject.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'subject_id', 'day', name='uq_archived_daily_total_user_subject_day')
+    )
+    op.create_table('archived_difficulty_total',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('difficulty', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('correct', sa.Integer(), nullable=False),
+    sa.Column('response_time_sum', sa.Float(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'difficulty', name='uq_archived_difficulty_total_user_difficulty')
+    )
+
+
+def downgrade():
+    op.drop_table('archived_difficulty_total')
+    op.drop_table('archived_daily_total')
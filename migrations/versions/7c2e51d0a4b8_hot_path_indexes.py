@@ -0,0 +1,36 @@
+"""Hot path indexes
+
+Revision ID: 7c2e51d0a4b8
+Revises: f9bef3649596
+Create Date: 2026-10-16 21:04:37.112604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e51d0a4b8'
+down_revision = 'f9bef3649596'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Anti-join against a user's answers, and the activity feed's keyset scan
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.create_index('ix_answer_user_created', ['user_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_answer_user_question', ['user_id', 'question_id'], unique=False)
+
+    # Unanswered-question lookup by subject and difficulty
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.create_index('ix_question_subject_difficulty', ['subject_id', 'difficulty'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_index('ix_question_subject_difficulty')
+
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.drop_index('ix_answer_user_question')
+        batch_op.drop_index('ix_answer_user_created')
@@ -0,0 +1,31 @@
+"""Pending answer grades
+
+Revision ID: 8d3f0b6c1e27
+Revises: 52ec7c7e2575
+Create Date: 2026-10-16 21:40:12.418305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f0b6c1e27'
+down_revision = '52ec7c7e2575'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.alter_column('is_correct', existing_type=sa.Boolean(), nullable=True)
+        batch_op.create_index('ix_answer_pending', ['id'], unique=False,
+                              postgresql_where=sa.text('is_correct IS NULL'),
+                              sqlite_where=sa.text('is_correct IS NULL'))
+
+
+def downgrade():
+    # Grade or delete pending answers first; the column cannot go back to NOT NULL while any remain
+    with op.batch_alter_table('answer', schema=None) as batch_op:
+        batch_op.drop_index('ix_answer_pending')
+        batch_op.alter_column('is_correct', existing_type=sa.Boolean(), nullable=False)
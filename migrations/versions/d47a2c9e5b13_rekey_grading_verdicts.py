@@ -0,0 +1,26 @@
+"""Re-key grading verdicts
+
+Revision ID: d47a2c9e5b13
+Revises: 6b1d8e4a9c30
+Create Date: 2026-10-16 23:40:12.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd47a2c9e5b13'
+down_revision = '6b1d8e4a9c30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Stored hashes came from a normalization that dropped signs and decimal points, so '74'
+    # would still hit a verdict given for '7.4'; the cache refills from new submissions
+    op.execute(sa.text('DELETE FROM grading_verdict'))
+
+
+def downgrade():
+    op.execute(sa.text('DELETE FROM grading_verdict'))
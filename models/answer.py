@@ -5,7 +5,7 @@ class Answer(db.Model):
     """Answer model for tracking user responses and performance."""
     id = db.Column(db.Integer, primary_key=True)
     user_response = db.Column(db.Text, nullable=False)
-    is_correct = db.Column(db.Boolean, nullable=False)
+    is_correct = db.Column(db.Boolean, nullable=True)  # None while a free-recall answer waits for its grade
     response_time = db.Column(db.Float, nullable=False)  # Time in seconds
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -16,6 +16,16 @@ class Answer(db.Model):
     # Additional tracking fields
     mode = db.Column(db.String(20), nullable=False)  # 'multiple_choice' or 'free_recall'
     difficulty_at_time = db.Column(db.Integer, nullable=False)  # The difficulty level when answered
+    idempotency_key = db.Column(db.String(64), nullable=True)  # Client-chosen key so retried bulk syncs are not counted twice
+    
+    __table_args__ = (
+        db.Index('ix_answer_user_question', 'user_id', 'question_id'),
+        db.Index('ix_answer_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_answer_created', 'created_at', 'id'),  # Whole-table exports in keyset order
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_answer_user_idempotency_key'),
+        # Partial index over the few ungraded rows, for the grading queue's recovery sweep
+        db.Index('ix_answer_pending', 'id', postgresql_where=db.text('is_correct IS NULL'), sqlite_where=db.text('is_correct IS NULL')),
+    )
     
     def __repr__(self):
         return f"Answer(User: {self.user_id}, Question: {self.question_id}, Correct: {self.is_correct})"
@@ -0,0 +1,20 @@
+from app import db
+
+class ArchivedDailyTotal(db.Model):
+    """Per-user, per-subject, per-day totals of answers moved out of Answer into archive files."""
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    response_time_sum = db.Column(db.Float, nullable=False, default=0.0)  # Seconds
+    
+    # Foreign keys
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'subject_id', 'day', name='uq_archived_daily_total_user_subject_day'),
+    )
+    
+    def __repr__(self):
+        return f"ArchivedDailyTotal(User: {self.user_id}, Subject: {self.subject_id}, Day: {self.day}, Total: {self.total})"
@@ -0,0 +1,19 @@
+from app import db
+
+class ArchivedDifficultyTotal(db.Model):
+    """Per-user totals at each difficulty level of answers moved out of Answer into archive files."""
+    id = db.Column(db.Integer, primary_key=True)
+    difficulty = db.Column(db.Integer, nullable=False)  # Difficulty level when answered
+    total = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    response_time_sum = db.Column(db.Float, nullable=False, default=0.0)  # Seconds
+    
+    # Foreign keys
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'difficulty', name='uq_archived_difficulty_total_user_difficulty'),
+    )
+    
+    def __repr__(self):
+        return f"ArchivedDifficultyTotal(User: {self.user_id}, Difficulty: {self.difficulty}, Total: {self.total})"
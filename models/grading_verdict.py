@@ -0,0 +1,19 @@
+from app import db
+from datetime import datetime
+
+class GradingVerdict(db.Model):
+    """Persisted free-recall grading result for a normalized response to a question."""
+    id = db.Column(db.Integer, primary_key=True)
+    response_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the normalized answer and response
+    is_correct = db.Column(db.Boolean, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Foreign keys
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('question_id', 'response_hash', name='uq_grading_verdict_question_response'),
+    )
+    
+    def __repr__(self):
+        return f"GradingVerdict(Question: {self.question_id}, Correct: {self.is_correct})"
@@ -0,0 +1,34 @@
+from app import db
+from sqlalchemy.exc import IntegrityError
+
+def lock_rows(model, user_id, key, ids, **defaults):
+    """Rows of a per-user model for each of ids, by id, locked until the transaction ends; missing rows are inserted with defaults.
+
+    A concurrent first answer may insert the same row: the savepoint absorbs the unique
+    violation and the rows are read again, once. Any other integrity error (a user, subject or
+    question that does not exist) leaves rows missing after that read and is raised.
+    """
+    column = getattr(model, key)
+    wanted = set(ids)
+    found = _locked(model, user_id, column, wanted)
+    missing = wanted - found.keys()
+    if not missing:
+        return found
+    rows = [model(user_id=user_id, **{key: row_id}, **defaults) for row_id in missing]
+    try:
+        with db.session.begin_nested():
+            db.session.add_all(rows)
+    except IntegrityError:
+        found = _locked(model, user_id, column, wanted)
+        if wanted - found.keys():
+            raise
+        return found
+    # Inserted rows are held by this transaction until it ends
+    found.update((getattr(row, key), row) for row in rows)
+    return found
+
+def _locked(model, user_id, column, ids):
+    # Fixed lock order, and fresh values in case the session already holds a row
+    rows = model.query.filter(model.user_id == user_id, column.in_(ids))\
+        .order_by(column).with_for_update().populate_existing()
+    return {getattr(row, column.key): row for row in rows}
@@ -0,0 +1,66 @@
+from app import db
+from models.locking import lock_rows
+from datetime import datetime
+
+class Mastery(db.Model):
+    """Running per-user, per-subject performance used for difficulty selection."""
+    id = db.Column(db.Integer, primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    recent = db.Column(db.String(100), nullable=False, default='')  # Rolling window of outcomes, oldest first ('1' correct, '0' incorrect)
+    difficulty = db.Column(db.Integer, nullable=False, default=1)  # 1-10 scale
+    irt_ability = db.Column(db.Float, nullable=True)  # Calibrated ability in the subject (logit scale); None until calibrated
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Foreign keys
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'subject_id', name='uq_mastery_user_subject'),
+    )
+
+    # Difficulty moves once the window holds enough evidence (0.9+ accuracy → increase difficulty)
+    MIN_WINDOW_ATTEMPTS = 10
+    PROMOTE_ACCURACY = 0.9
+    DEMOTE_ACCURACY = 0.6
+
+    def __repr__(self):
+        return f"Mastery(User: {self.user_id}, Subject: {self.subject_id}, Difficulty: {self.difficulty})"
+
+    @property
+    def accuracy(self):
+        return self.correct / self.attempts if self.attempts else 0
+
+    @property
+    def window_accuracy(self):
+        return self.recent.count('1') / len(self.recent) if self.recent else 0
+
+    def record(self, is_correct, window=20):
+        """Fold one graded answer into the aggregate and re-evaluate difficulty."""
+        window = max(1, min(window, 100))
+        self.attempts += 1
+        self.correct += 1 if is_correct else 0
+        self.recent = (self.recent + ('1' if is_correct else '0'))[-window:]
+
+        if len(self.recent) >= min(window, self.MIN_WINDOW_ATTEMPTS):
+            accuracy = self.window_accuracy
+            if accuracy > self.PROMOTE_ACCURACY and self.difficulty < 10:
+                self.difficulty += 1
+                self.recent = ''
+            elif accuracy < self.DEMOTE_ACCURACY and self.difficulty > 1:
+                self.difficulty -= 1
+                self.recent = ''
+
+    @classmethod
+    def for_update(cls, user_id, subject_id):
+        """Lock the aggregate row for a user and subject until the transaction ends, inserting it if missing."""
+        return cls.for_update_many(user_id, [subject_id])[subject_id]
+
+    @classmethod
+    def for_update_many(cls, user_id, subject_ids):
+        """Lock the aggregate rows for a user and several subjects in one query, inserting missing ones.
+
+        The row locks serialise concurrent answers in the same subject, so no increment is lost.
+        """
+        return lock_rows(cls, user_id, 'subject_id', subject_ids, attempts=0, correct=0, recent='', difficulty=1)
@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+import math
 
 class Question(db.Model):
     """Question model for storing AI-generated questions."""
@@ -8,6 +9,8 @@ class Question(db.Model):
     answer = db.Column(db.Text, nullable=False)
     explanation = db.Column(db.Text, nullable=True)
     difficulty = db.Column(db.Integer, default=1)  # 1-10 scale
+    irt_difficulty = db.Column(db.Float, nullable=True)  # Calibrated from outcomes (logit scale); None until calibrated
+    irt_discrimination = db.Column(db.Float, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Foreign keys
@@ -23,29 +26,68 @@ class Question(db.Model):
     # Relationships
     answers = db.relationship('Answer', backref='question', lazy=True)
     
+    __table_args__ = (
+        db.Index('ix_question_subject_difficulty', 'subject_id', 'difficulty'),
+        db.Index('ix_question_subject_irt_difficulty', 'subject_id', 'irt_difficulty'),
+    )
+    
     def __repr__(self):
         return f"Question('{self.text[:30]}...', Difficulty: {self.difficulty})"
     
+    @classmethod
+    def unanswered_query(cls, user_id, subject_id, difficulty, band=0):
+        """Stored questions in the subject and difficulty band that the user has not answered, oldest first."""
+        if band:
+            in_band = cls.difficulty.between(difficulty - band, difficulty + band)
+        else:
+            in_band = cls.difficulty == difficulty  # Equality lets the index also serve the ORDER BY
+        return cls.query.filter(
+            cls.subject_id == subject_id,
+            in_band,
+            cls._unanswered_by(user_id)
+        ).order_by(cls.id)
+    
+    @classmethod
+    def find_unanswered(cls, user_id, subject_id, difficulty, band=0):
+        """Oldest stored question in the subject and difficulty band that the user has not answered."""
+        return cls.unanswered_query(user_id, subject_id, difficulty, band).first()
+    
+    @classmethod
+    def targeted_queries(cls, user_id, subject_id, ability, target):
+        """Unanswered calibrated questions nearest the ideal difficulty for a success rate, from above and below."""
+        # With discrimination 1, P(correct) = target exactly at ability - logit(target)
+        ideal = ability - math.log(target / (1 - target))
+        base = cls.query.filter(cls.subject_id == subject_id, cls._unanswered_by(user_id))
+        above = base.filter(cls.irt_difficulty >= ideal).order_by(cls.irt_difficulty)
+        below = base.filter(cls.irt_difficulty < ideal).order_by(cls.irt_difficulty.desc())
+        return above, below
+    
+    @classmethod
+    def find_targeted(cls, user_id, subject_id, ability, target):
+        """Unanswered calibrated question whose predicted success for this ability is closest to target."""
+        candidates = [query.first() for query in cls.targeted_queries(user_id, subject_id, ability, target)]
+        candidates = [question for question in candidates if question is not None]
+        return min(candidates, key=lambda question: abs(question.success_probability(ability) - target), default=None)
+    
+    def success_probability(self, ability):
+        """2PL probability that a learner of this ability answers correctly (None if uncalibrated)."""
+        if self.irt_difficulty is None:
+            return None
+        margin = (self.irt_discrimination or 1.0) * (ability - self.irt_difficulty)
+        return 1 / (1 + math.exp(-max(min(margin, 30), -30)))
+    
+    @classmethod
+    def _unanswered_by(cls, user_id):
+        from models.answer import Answer
+        
+        # Anti-join so the database does the exclusion instead of loading answered IDs
+        return ~db.session.query(Answer.id).filter(
+            Answer.user_id == user_id,
+            Answer.question_id == cls.id
+        ).exists()
+    
     def to_dict(self):
         """Convert question to dictionary format for API responses."""
-        question_dict = {
-            'id': self.id,
-            'text': self.text,
-            'difficulty': self.difficulty,
-            'subject_id': self.subject_id,
-            'subject_name': self.subject.name,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }
+        from services.question_serializer import question_serializer
         
-        # Include multiple choice options if present
-        if self.option_a:
-            question_dict.update({
-                'options': {
-                    'a': self.option_a,
-                    'b': self.option_b,
-                    'c': self.option_c,
-                    'd': self.option_d
-                }
-            })
-            
-        return question_dict
+        return dict(question_serializer.payload(self, 'full'))
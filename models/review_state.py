@@ -0,0 +1,86 @@
+from app import db
+from models.locking import lock_rows
+from datetime import datetime, timedelta
+
+class ReviewState(db.Model):
+    """SM-2 memory state for one question a user has answered, with when it is next due for review."""
+    id = db.Column(db.Integer, primary_key=True)
+    repetitions = db.Column(db.Integer, nullable=False, default=0)  # Successful reviews in a row
+    interval_days = db.Column(db.Float, nullable=False, default=0)
+    ease = db.Column(db.Float, nullable=False, default=2.5)  # SM-2 easiness factor, never below 1.3
+    lapses = db.Column(db.Integer, nullable=False, default=0)  # Times a learned item was forgotten
+    due_at = db.Column(db.DateTime, nullable=False)
+    last_reviewed_at = db.Column(db.DateTime)
+
+    # Foreign keys
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'question_id', name='uq_review_state_user_question'),
+        db.Index('ix_review_state_user_due', 'user_id', 'due_at'),  # Most overdue item is one index seek
+    )
+
+    MIN_EASE = 1.3
+    # Correct answers faster than these many seconds count as easy (5) or normal (4) recall, slower as hard (3)
+    EASY_SECONDS = 10
+    NORMAL_SECONDS = 30
+
+    def __repr__(self):
+        return f"ReviewState(User: {self.user_id}, Question: {self.question_id}, Due: {self.due_at})"
+
+    @classmethod
+    def quality(cls, is_correct, response_time=None):
+        """SM-2 recall quality (0-5) from a graded answer and how long it took."""
+        if not is_correct:
+            return 1
+        if response_time is not None and response_time < cls.EASY_SECONDS:
+            return 5
+        if response_time is None or response_time < cls.NORMAL_SECONDS:
+            return 4
+        return 3
+
+    def schedule(self, quality, reviewed_at):
+        """Apply one review of the given quality and move the due date (SM-2)."""
+        if quality >= 3:
+            if self.repetitions == 0:
+                self.interval_days = 1
+            elif self.repetitions == 1:
+                self.interval_days = 6
+            else:
+                self.interval_days = round(self.interval_days * self.ease, 2)
+            self.repetitions += 1
+        else:
+            # Forgotten: relearn from the start, but keep the lowered ease
+            if self.repetitions:
+                self.lapses += 1
+            self.repetitions = 0
+            self.interval_days = 1
+
+        self.ease = max(self.MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.last_reviewed_at = reviewed_at
+        self.due_at = reviewed_at + timedelta(days=self.interval_days)
+
+    @classmethod
+    def for_update(cls, user_id, question_id):
+        """Lock the state for a user and question until the transaction ends, inserting it if missing."""
+        return cls.for_update_many(user_id, [question_id])[question_id]
+
+    @classmethod
+    def for_update_many(cls, user_id, question_ids):
+        """Lock the states for a user and several questions in one query, inserting missing ones.
+
+        Locking keeps concurrent reviews of one question from losing an interval or ease update.
+        New rows are due now until the caller schedules them.
+        """
+        return lock_rows(cls, user_id, 'question_id', question_ids,
+                         repetitions=0, interval_days=0, ease=2.5, lapses=0, due_at=datetime.utcnow())
+
+    @classmethod
+    def queue_query(cls, user_id, subject_id=None):
+        """A user's review queue, earliest due first; walks ix_review_state_user_due in order."""
+        query = cls.query.filter(cls.user_id == user_id)
+        if subject_id is not None:
+            from models.question import Question
+            query = query.join(Question, cls.question_id == Question.id).filter(Question.subject_id == subject_id)
+        return query.order_by(cls.due_at)
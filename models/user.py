@@ -4,7 +4,9 @@ from app import db, login_manager
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Served from a short-lived cache that every write to the user row invalidates
+    from services.user_cache import user_cache
+    return user_cache.load(int(user_id))
 
 class User(db.Model, UserMixin):
     """User model for authentication and tracking."""
@@ -23,5 +25,8 @@ class User(db.Model, UserMixin):
     question_mode = db.Column(db.String(20), default='multiple_choice')  # 'multiple_choice' or 'free_recall'
     interactive_mode = db.Column(db.Boolean, default=False)
     
+    # Bumped whenever the user's answer history changes; dashboard ETags derive from it
+    stats_version = db.Column(db.Integer, nullable=False, default=0)
+    
     def __repr__(self):
         return f"User('{self.username}', '{self.email}')"
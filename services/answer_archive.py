@@ -0,0 +1,157 @@
+from app import db
+from models.answer import Answer
+from models.question import Question
+from models.user import User
+from models.archived_daily_total import ArchivedDailyTotal
+from models.archived_difficulty_total import ArchivedDifficultyTotal
+from services import rollups
+from sqlalchemy import delete, func, insert, select, tuple_
+from datetime import datetime
+import gzip
+import json
+import os
+import time
+
+# Every Answer column, so a restored row is the row that was archived; subject_id rides along for the totals
+COLUMNS = tuple(column.name for column in Answer.__table__.columns)
+
+SUFFIX = '.ndjson.gz'
+
+def has_archived():
+    """Whether any answers are currently archived, so Answer alone no longer holds the full history."""
+    return db.session.query(ArchivedDifficultyTotal.id).filter(ArchivedDifficultyTotal.total > 0).first() is not None
+
+def eligible(before):
+    """Graded answers created before `before`, i.e. what archive() would move."""
+    return db.session.query(func.count(Answer.id))\
+        .filter(Answer.created_at < before, Answer.is_correct.isnot(None)).scalar()
+
+def archive(directory, before, batch_size=1000, max_batches=None, pause=0.0):
+    """Move graded answers created before `before` into gzip-NDJSON files, one file per batch.
+
+    Batches walk (created_at, id) in keyset order, and each is its own short transaction: the file
+    is written and synced first, then the rows are folded into the archived totals and deleted
+    together, so dashboard totals and rollups.check stay exact and no lock outlives a batch. The
+    batch's users get a new stats_version in that transaction, since their activity pages change. A
+    failure leaves every answer in the table, an archive file or both; restore() skips rows that
+    are still in the table, so a file whose batch never committed is harmless. Pending answers
+    are left for a later run. Returns (answers archived, files written).
+
+    Only the dashboard totals are kept. Archived answers no longer stop a question from being
+    served to the same user again, no longer match a retried idempotency key, and are not
+    replayed by backfill-mastery, backfill-reviews or calibrate-irt, which refuse to run while
+    anything is archived unless told to use live rows only.
+    """
+    os.makedirs(directory, exist_ok=True)
+    archived = files = 0
+    after = None
+    while max_batches is None or files < max_batches:
+        records = _next_batch(before, after, batch_size)
+        if not records:
+            break
+        _write(os.path.join(directory, _file_name(records)), records)
+        try:
+            _fold(records, sign=1)
+            db.session.execute(
+                delete(Answer).where(Answer.id.in_([record['id'] for record in records]), Answer.is_correct.isnot(None)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        archived += len(records)
+        files += 1
+        after = (records[-1]['created_at'], records[-1]['id'])
+        if pause:
+            # Let request traffic at the table between batches
+            time.sleep(pause)
+    return archived, files
+
+def restore(path, batch_size=1000):
+    """Put the rows of one archive file back into Answer and take them out of the archived totals.
+
+    Rows whose id is already in the table are skipped, so restoring a file twice changes nothing.
+    Rows whose user or question has since been deleted stay archived, and in the totals. Users
+    with restored rows get a new stats_version in the batch's transaction.
+    Returns (answers restored, answers skipped).
+    """
+    restored = skipped = 0
+    for records in _read(path, batch_size):
+        ids = [record['id'] for record in records]
+        present = {answer_id for answer_id, in db.session.query(Answer.id).filter(Answer.id.in_(ids))}
+        users = {user_id for user_id, in db.session.query(User.id)
+                 .filter(User.id.in_({record['user_id'] for record in records}))}
+        questions = {question_id for question_id, in db.session.query(Question.id)
+                     .filter(Question.id.in_({record['question_id'] for record in records}))}
+        rows = [record for record in records
+                if record['id'] not in present and record['user_id'] in users and record['question_id'] in questions]
+        skipped += len(records) - len(rows)
+        if not rows:
+            continue
+        try:
+            db.session.execute(insert(Answer), [{column: record[column] for column in COLUMNS} for record in rows])
+            _fold(rows, sign=-1)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        restored += len(rows)
+    return restored, skipped
+
+def archive_files(directory):
+    """Archive file paths under directory, oldest batch first."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SUFFIX))
+
+def _next_batch(before, after, batch_size):
+    statement = select(Answer.__table__, Question.subject_id)\
+        .join(Question, Answer.question_id == Question.id)\
+        .where(Answer.created_at < before, Answer.is_correct.isnot(None))
+    if after:
+        statement = statement.where(tuple_(Answer.created_at, Answer.id) > tuple_(*after))
+    statement = statement.order_by(Answer.created_at, Answer.id).limit(batch_size)
+    return [dict(row._mapping) for row in db.session.execute(statement)]
+
+def _fold(records, sign):
+    by_user = {}
+    for record in records:
+        by_user.setdefault(record['user_id'], []).append((
+            record['subject_id'], record['difficulty_at_time'], record['is_correct'],
+            record['response_time'], record['created_at']
+        ))
+    for user_id, answers in by_user.items():
+        rollups.record_answers(user_id, answers, ArchivedDailyTotal, ArchivedDifficultyTotal, sign=sign)
+    # Recent activity and history pages are cached per stats_version
+    rollups.bump_stats_versions(by_user.keys())
+
+def _file_name(records):
+    # Sorts by the batch's first answer; the archive time keeps a re-archived range from overwriting a file
+    first, last = records[0], records[-1]
+    return (f"answers-{first['created_at']:%Y%m%dT%H%M%S}-{first['id']}-{last['id']}"
+            f"-{datetime.utcnow():%Y%m%dT%H%M%S%f}{SUFFIX}")
+
+def _write(path, records):
+    partial = path + '.partial'
+    with open(partial, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+            for record in records:
+                f.write(json.dumps(dict(record, created_at=record['created_at'].isoformat())).encode('utf-8') + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    # Only complete files carry the archive suffix
+    os.replace(partial, path)
+
+def _read(path, batch_size):
+    batch = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            record['created_at'] = datetime.fromisoformat(record['created_at'])
+            batch.append(record)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,78 @@
+from models.answer import Answer
+from models.question import Question
+from models.subject import Subject
+from services.cursors import encode_cursor
+from sqlalchemy import select, tuple_
+import csv
+import io
+import json
+import zlib
+
+# Columns in export order; every row also carries the cursor to resume after it
+FIELDS = ('id', 'created_at', 'user_id', 'subject', 'question_id', 'question_text', 'user_response',
+          'is_correct', 'response_time', 'difficulty_at_time', 'mode')
+
+def export_query(user_id=None, start=None, end=None, subject_id=None, after=None):
+    """Answer history joined with question text and subject name, oldest first.
+
+    start is inclusive and end exclusive. Keyset on (created_at, id) after a decoded cursor, so a
+    resumed export is an index range scan rather than an OFFSET.
+    """
+    statement = select(
+        Answer.id,
+        Answer.created_at,
+        Answer.user_id,
+        Subject.name.label('subject'),
+        Answer.question_id,
+        Question.text.label('question_text'),
+        Answer.user_response,
+        Answer.is_correct,
+        Answer.response_time,
+        Answer.difficulty_at_time,
+        Answer.mode
+    ).join(Question, Answer.question_id == Question.id)\
+     .join(Subject, Question.subject_id == Subject.id)
+
+    if user_id is not None:
+        statement = statement.where(Answer.user_id == user_id)
+    if subject_id is not None:
+        statement = statement.where(Question.subject_id == subject_id)
+    if start is not None:
+        statement = statement.where(Answer.created_at >= start)
+    if end is not None:
+        statement = statement.where(Answer.created_at < end)
+    if after:
+        statement = statement.where(tuple_(Answer.created_at, Answer.id) > tuple_(*after))
+    return statement.order_by(Answer.created_at, Answer.id)
+
+def stream_rows(session, statement, batch_size=1000):
+    """Lists of up to batch_size rows from a server-side cursor, so memory stays flat however long the history is."""
+    yield from session.execute(statement.execution_options(yield_per=batch_size)).partitions()
+
+def ndjson_chunks(partitions):
+    """One bytes chunk of newline-delimited JSON per partition of rows."""
+    for rows in partitions:
+        yield ''.join(json.dumps(_record(row)) + '\n' for row in rows).encode('utf-8')
+
+def csv_gzip_chunks(partitions):
+    """Gzip-compressed CSV with a header row, one compressed chunk per partition of rows."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS + ('cursor',))
+    for rows in partitions:
+        for row in rows:
+            record = _record(row)
+            writer.writerow([record[field] for field in FIELDS + ('cursor',)])
+        chunk = compressor.compress(buffer.getvalue().encode('utf-8'))
+        buffer.seek(0)
+        buffer.truncate()
+        if chunk:
+            yield chunk
+    yield compressor.compress(buffer.getvalue().encode('utf-8')) + compressor.flush()
+
+def _record(row):
+    record = dict(row._mapping)
+    record['cursor'] = encode_cursor(row.created_at, row.id)
+    record['created_at'] = row.created_at.isoformat()
+    return record
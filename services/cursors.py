@@ -0,0 +1,14 @@
+from datetime import datetime
+import base64
+import binascii
+
+def encode_cursor(created_at, answer_id):
+    """Opaque keyset position for an answer, shared by the activity feed and the history export."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{answer_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        created_at, answer_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(answer_id)
+    except (UnicodeError, ValueError, binascii.Error) as e:
+        raise ValueError('Invalid cursor') from e
@@ -0,0 +1,110 @@
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool, NullPool
+import threading
+import time
+
+class PoolMetrics:
+    """Checkout wait and connection churn counters shared by every engine built from a profile.
+
+    Checkout time covers waiting for a free pooled connection plus, when the pool has to open one,
+    the connect itself, so it is the full cost a request pays before its first query.
+    """
+
+    def __init__(self, app=None):
+        self.profile = None
+        self.slow_checkout = 0.1
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._counters = {'checkouts': 0, 'slow_checkouts': 0, 'connects': 0, 'closes': 0, 'invalidations': 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app import db
+        from config import engine_profiles
+
+        self.profile = app.config['DB_PROFILE']
+        self.slow_checkout = app.config['DB_SLOW_CHECKOUT']
+        pragmas = engine_profiles[self.profile].PRAGMAS
+        if pragmas:
+            with app.app_context():
+                engine = db.engine
+
+            @event.listens_for(engine, 'connect')
+            def apply_pragmas(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for name, value in pragmas.items():
+                    cursor.execute(f'PRAGMA {name}={value}')
+                cursor.close()
+
+    def record_checkout(self, seconds):
+        with self._lock:
+            self._counters['checkouts'] += 1
+            self._counters['slow_checkouts'] += seconds > self.slow_checkout
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+
+    def stats(self, engine=None):
+        with self._lock:
+            stats = dict(self._counters)
+            wait_total, wait_max = self._wait_total, self._wait_max
+        minutes = (time.monotonic() - self._started) / 60
+        stats['profile'] = self.profile
+        stats['checkout_ms'] = {
+            'mean': round(wait_total / stats['checkouts'] * 1000, 3) if stats['checkouts'] else 0,
+            'max': round(wait_max * 1000, 3)
+        }
+        # New connections per checkout: near 0 for a warm pool, 1 without one
+        stats['connects_per_checkout'] = round(stats['connects'] / stats['checkouts'], 3) if stats['checkouts'] else 0
+        stats['connects_per_minute'] = round(stats['connects'] / minutes, 2) if minutes else 0
+        if engine is not None and isinstance(engine.pool, QueuePool):
+            stats['pool'] = {
+                'size': engine.pool.size(),
+                'checked_out': engine.pool.checkedout(),
+                'overflow': engine.pool.overflow()
+            }
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+pool_metrics = PoolMetrics()
+
+class _TimedCheckout:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            pool_metrics.record_checkout(time.perf_counter() - start)
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool that reports checkout time to pool_metrics."""
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    """NullPool that reports checkout time to pool_metrics."""
+
+POOL_CLASSES = {'queue': TimedQueuePool, 'null': TimedNullPool}
+
+for pool_class in POOL_CLASSES.values():
+    event.listen(pool_class, 'connect', lambda *args: pool_metrics._count('connects'))
+    event.listen(pool_class, 'close', lambda *args: pool_metrics._count('closes'))
+    event.listen(pool_class, 'close_detached', lambda *args: pool_metrics._count('closes'))
+    event.listen(pool_class, 'invalidate', lambda *args: pool_metrics._count('invalidations'))
+
+def engine_options(settings):
+    """SQLALCHEMY_ENGINE_OPTIONS for the selected profile, with a pool class that feeds pool_metrics."""
+    from config import engine_profiles
+
+    uri = settings['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite') and uri.split('?')[0] in ('sqlite://', 'sqlite:///:memory:'):
+        # Flask-SQLAlchemy shares one connection for in-memory databases, which no pool settings apply to
+        return {}
+
+    profile = engine_profiles[settings['DB_PROFILE']]
+    options = profile.engine_options(settings)
+    options['poolclass'] = POOL_CLASSES[profile.POOL]
+    return options
@@ -0,0 +1,121 @@
+from services.cache import LRUCache
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import attributes
+import hashlib
+import threading
+import unicodedata
+
+# Sentence punctuation that can end a response without changing it ('Paris.', 'Paris!')
+TRAILING_PUNCTUATION = '.!?,;:'
+
+def normalize_response(text):
+    """Canonical form of a free-recall response: compatibility-folded, case-folded, whitespace
+    collapsed and trailing sentence punctuation trimmed.
+
+    Nothing that can change the meaning is removed: signs, decimal points, slashes and accents
+    all stay, so '-40' and '40' or '7.4' and '74' never share a cached verdict.
+    """
+    text = ' '.join(unicodedata.normalize('NFKC', text or '').casefold().split())
+    return text.rstrip(TRAILING_PUNCTUATION).rstrip()
+
+def response_hash(normalized):
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+class GradingCache:
+    """Two-tier cache of free-recall verdicts keyed by question, its normalized answer and the normalized response.
+
+    The in-process LRU answers repeat submissions without a query; the database tier
+    keeps verdicts across restarts and serverless cold starts. Because the answer is part
+    of the key, editing it makes every process miss at once, without cross-process invalidation.
+    """
+
+    def __init__(self, app=None):
+        self.lru = LRUCache()
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.lru = LRUCache(max_size=app.config['GRADING_CACHE_SIZE'], ttl=app.config['GRADING_CACHE_TTL'])
+
+        from models.question import Question
+        from models.grading_verdict import GradingVerdict
+
+        @event.listens_for(Question, 'after_update')
+        def invalidate_on_answer_edit(mapper, connection, target):
+            # Verdicts were judged against the old answer, so drop them with the edit
+            if attributes.get_history(target, 'answer').has_changes():
+                connection.execute(
+                    GradingVerdict.__table__.delete().where(GradingVerdict.question_id == target.id)
+                )
+                self.lru.delete_where(lambda key: key[0] == target.id)
+
+    def get(self, question, user_response):
+        """Cached verdict for a response to the question as it stands, or None when it has not been graded before."""
+        from models.grading_verdict import GradingVerdict
+
+        key, hashed = _keys(question, user_response)
+        verdict = self.lru.get(key)
+        if verdict is not None:
+            self._count('memory_hits')
+            return verdict
+
+        row = GradingVerdict.query.filter_by(question_id=question.id, response_hash=hashed).first()
+        if row is None:
+            self._count('misses')
+            return None
+
+        self._count('db_hits')
+        self.lru.set(key, row.is_correct)
+        return row.is_correct
+
+    def put(self, question, user_response, is_correct):
+        """Record a verdict in both tiers. The row commits with the caller's transaction."""
+        from app import db
+        from models.grading_verdict import GradingVerdict
+
+        key, hashed = _keys(question, user_response)
+        self.lru.set(key, is_correct)
+        try:
+            # Savepoint so a concurrent insert of the same verdict cannot fail the caller's transaction
+            with db.session.begin_nested():
+                db.session.add(GradingVerdict(
+                    question_id=question.id,
+                    response_hash=hashed,
+                    is_correct=is_correct
+                ))
+        except IntegrityError:
+            pass
+        self._count('stores')
+
+    def invalidate_question(self, question_id):
+        """Forget every verdict for a question, e.g. after its answer is edited."""
+        from app import db
+        from models.grading_verdict import GradingVerdict
+
+        self.lru.delete_where(lambda key: key[0] == question_id)
+        deleted = GradingVerdict.query.filter_by(question_id=question_id).delete()
+        db.session.commit()
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['memory_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['db_hits']) / lookups if lookups else 0
+        stats['memory_entries'] = len(self.lru)
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+def _keys(question, user_response):
+    # LRU key and stored hash; a verdict judged against an old answer can never match the new one
+    answer = normalize_response(question.answer)
+    normalized = normalize_response(user_response)
+    return (question.id, answer, normalized), response_hash(f'{answer}\n{normalized}')
+
+grading_cache = GradingCache()
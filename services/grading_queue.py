@@ -0,0 +1,217 @@
+from collections import deque
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class GradingQueue:
+    """Grades pending free-recall answers on a bounded pool of background workers.
+
+    submit_answer stores the Answer with is_correct NULL and hands its id here. Each worker
+    takes up to batch_size ids that arrive within batch_wait seconds and grades them with one
+    model call, then folds the verdicts into mastery, review state and rollups. A sweeper
+    re-queues pending rows from the database on start-up and every sweep_interval seconds,
+    so work survives restarts and a full queue. Rows are claimed with a conditional UPDATE,
+    so an answer graded twice (by two processes, say) is still only counted once.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.workers = 2
+        self.batch_size = 8
+        self.batch_wait = 0.05
+        self.sweep_interval = 30.0
+        self._queue = queue.Queue(maxsize=1000)
+        self._lock = threading.Lock()
+        self._graded = threading.Condition(self._lock)
+        self._queued = set()
+        self._recently_graded = deque(maxlen=1000)
+        self._threads = []
+        self._counters = {'submitted': 0, 'overflows': 0, 'recovered': 0, 'graded': 0, 'batches': 0, 'errors': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config['GRADING_ASYNC'] and not app.config['SERVERLESS']
+        self.workers = app.config['GRADING_WORKERS']
+        self.batch_size = app.config['GRADING_BATCH_SIZE']
+        self.batch_wait = app.config['GRADING_BATCH_WAIT']
+        self.sweep_interval = app.config['GRADING_SWEEP_INTERVAL']
+        self._queue = queue.Queue(maxsize=app.config['GRADING_QUEUE_SIZE'])
+        if self.enabled:
+            # Start on the first request rather than at import, so CLI commands do not spawn workers
+            app.before_request(self._ensure_workers)
+
+    def submit(self, answer_id):
+        """Queue a stored pending answer for grading. When the queue is full the sweeper picks it up later."""
+        self._ensure_workers()
+        with self._lock:
+            self._counters['submitted'] += 1
+            if answer_id in self._queued:
+                return
+            self._queued.add(answer_id)
+        try:
+            self._queue.put_nowait(answer_id)
+        except queue.Full:
+            with self._lock:
+                self._queued.discard(answer_id)
+                self._counters['overflows'] += 1
+
+    def wait(self, answer_id, timeout):
+        """Block until this process grades the answer or the timeout passes; True if it was graded here."""
+        deadline = time.monotonic() + timeout
+        with self._graded:
+            while answer_id not in self._recently_graded:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._graded.wait(remaining)
+            return True
+
+    def recover(self):
+        """Queue pending answers found in the database that are not already queued here."""
+        from app import db
+        from models.answer import Answer
+
+        with self.app.app_context():
+            try:
+                pending = [answer_id for answer_id, in db.session.query(Answer.id)
+                           .filter(Answer.is_correct.is_(None))
+                           .order_by(Answer.id)
+                           .limit(self._queue.maxsize)]
+            finally:
+                db.session.remove()
+
+        recovered = 0
+        for answer_id in pending:
+            with self._lock:
+                if answer_id in self._queued:
+                    continue
+                self._queued.add(answer_id)
+            try:
+                self._queue.put_nowait(answer_id)
+            except queue.Full:
+                with self._lock:
+                    self._queued.discard(answer_id)
+                break
+            recovered += 1
+        with self._lock:
+            self._counters['recovered'] += recovered
+        return recovered
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['queued'] = len(self._queued)
+        stats['enabled'] = self.enabled
+        stats['workers'] = len(self._threads)
+        stats['avg_batch'] = stats['graded'] / stats['batches'] if stats['batches'] else 0
+        return stats
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [threading.Thread(target=self._sweep, name='grading-sweeper', daemon=True)]
+            self._threads += [
+                threading.Thread(target=self._run, name=f'grading-worker-{index}', daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _sweep(self):
+        while True:
+            try:
+                self.recover()
+            except Exception:
+                logger.exception("Recovering pending answers failed")
+            time.sleep(self.sweep_interval)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Micro-batch: give answers submitted around the same time a moment to share the model call
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                with self.app.app_context():
+                    graded = self.grade(batch)
+                with self._graded:
+                    self._counters['batches'] += 1
+                    self._counters['graded'] += len(graded)
+                    self._recently_graded.extend(graded)
+                    self._graded.notify_all()
+            except Exception:
+                with self._lock:
+                    self._counters['errors'] += 1
+                logger.exception("Grading batch %s failed", batch)
+            finally:
+                with self._lock:
+                    self._queued.difference_update(batch)
+
+    def grade(self, answer_ids):
+        """Grade still-pending answers among answer_ids and apply them; returns the ids this call graded."""
+        from app import db
+        from models.answer import Answer
+        from models.question import Question
+        from models.mastery import Mastery
+        from models.review_state import ReviewState
+        from models.user import User
+        from services import rollups
+        from services.answer_grading import grade_free_recall
+        from sqlalchemy import update
+
+        try:
+            rows = db.session.query(Answer, Question).join(Question, Answer.question_id == Question.id)\
+                .filter(Answer.id.in_(answer_ids), Answer.is_correct.is_(None))\
+                .order_by(Answer.created_at, Answer.id).all()
+            if not rows:
+                return []
+
+            verdicts = grade_free_recall([(question, answer.user_response) for answer, question in rows])
+
+            window = self.app.config['MASTERY_WINDOW']
+            graded = []
+            by_user = {}
+            for (answer, question), is_correct in zip(rows, verdicts):
+                claimed = db.session.execute(
+                    update(Answer).where(Answer.id == answer.id, Answer.is_correct.is_(None)).values(is_correct=is_correct),
+                    execution_options={'synchronize_session': False}
+                ).rowcount
+                if not claimed:
+                    continue
+                Mastery.for_update(answer.user_id, question.subject_id).record(is_correct, window)
+                ReviewState.for_update(answer.user_id, question.id).schedule(
+                    ReviewState.quality(is_correct, answer.response_time), answer.created_at
+                )
+                by_user.setdefault(answer.user_id, []).append(
+                    (question.subject_id, answer.difficulty_at_time, is_correct, answer.response_time, answer.created_at)
+                )
+                graded.append(answer.id)
+
+            for user_id, answers in by_user.items():
+                rollups.record_answers(user_id, answers)
+                # Through the ORM so the session loader cache drops its copy of the user
+                user = db.session.get(User, user_id)
+                if user is not None:
+                    user.stats_version = User.stats_version + 1
+            db.session.commit()
+            return graded
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+grading_queue = GradingQueue()
@@ -0,0 +1,185 @@
+from flask import g, request, has_request_context, before_render_template, template_rendered, Response, abort
+from sqlalchemy import event
+from contextlib import contextmanager
+import hmac
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Components timed inside a request, in Server-Timing header order
+COMPONENTS = ('db', 'llm', 'bcrypt', 'render')
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# SQL statements kept per request for the slow-request log
+MAX_LOGGED_STATEMENTS = 50
+
+class Histogram:
+    """Cumulative-bucket histogram per label value, in the shape Prometheus expects."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, label, value):
+        counts, total, observations = self.series.get(label, ([0] * len(self.buckets), 0.0, 0))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+        self.series[label] = (counts, total + value, observations + 1)
+
+class RequestMetrics:
+    """Per-request wall, DB, LLM, bcrypt and template render time, exposed three ways.
+
+    Each response carries a Server-Timing header, /metrics serves per-endpoint histograms in
+    Prometheus text format to scrapers holding METRICS_TOKEN, and a sample of slow requests is
+    logged with their SQL. Time spent
+    streaming a response body happens after the response is recorded, so it is not included.
+    """
+
+    def __init__(self, app=None):
+        self.slow_threshold = 1.0
+        self.slow_sample_rate = 0.1
+        self.token = ''
+        self._lock = threading.Lock()
+        self._histograms = {component: Histogram() for component in ('request',) + COMPONENTS}
+        self._requests = {}
+        self._queries = {}
+        self._llm_calls = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app import db
+
+        self.slow_threshold = app.config['METRICS_SLOW_REQUEST']
+        self.slow_sample_rate = app.config['METRICS_SLOW_SAMPLE_RATE']
+        self.token = app.config['METRICS_TOKEN']
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+        with app.app_context():
+            engine = db.engine
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def query_started(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def query_finished(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info['_query_started'].pop()
+            self.record('db', time.perf_counter() - started, statement)
+
+        @event.listens_for(engine, 'handle_error')
+        def query_failed(context):
+            # after_cursor_execute never runs for a failed statement; drop its start time
+            if context.connection is not None:
+                context.connection.info.pop('_query_started', None)
+
+    def record(self, component, seconds, statement=None):
+        """Add one timed call to the current request's totals; a no-op outside a request."""
+        if not has_request_context() or '_metrics_start' not in g:
+            return
+        g._metrics_time[component] += seconds
+        g._metrics_calls[component] += 1
+        if statement is not None and len(g._metrics_statements) < MAX_LOGGED_STATEMENTS:
+            g._metrics_statements.append((seconds, statement))
+
+    @contextmanager
+    def timed(self, component):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(component, time.perf_counter() - start)
+
+    def metrics_view(self):
+        # Off unless a token is configured; scrapers send it as a bearer token
+        if not self.token:
+            abort(404)
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode('utf-8'), self.token.encode('utf-8')):
+            abort(401)
+        return Response(self.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    def render_prometheus(self):
+        with self._lock:
+            histograms = {
+                name: {label: (list(counts), total, observations) for label, (counts, total, observations) in histogram.series.items()}
+                for name, histogram in self._histograms.items()
+            }
+            requests, queries, llm_calls = dict(self._requests), dict(self._queries), dict(self._llm_calls)
+
+        lines = []
+        for name, series in histograms.items():
+            metric = 'app_request_duration_seconds' if name == 'request' else f'app_request_{name}_seconds'
+            what = 'Wall time' if name == 'request' else f'Time in {name}'
+            lines += [f'# HELP {metric} {what} per request, by endpoint.', f'# TYPE {metric} histogram']
+            for endpoint, (counts, total, observations) in sorted(series.items()):
+                label = f'endpoint="{endpoint}"'
+                for bound, count in zip(BUCKETS, counts):
+                    lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {observations}')
+                lines.append(f'{metric}_sum{{{label}}} {total:.6f}')
+                lines.append(f'{metric}_count{{{label}}} {observations}')
+
+        lines += ['# HELP app_requests_total Requests served, by endpoint and status.', '# TYPE app_requests_total counter']
+        for (endpoint, status), count in sorted(requests.items()):
+            lines.append(f'app_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        for metric, what, counts in (('app_db_queries_total', 'SQL statements', queries),
+                                     ('app_llm_calls_total', 'Model calls', llm_calls)):
+            lines += [f'# HELP {metric} {what} executed, by endpoint.', f'# TYPE {metric} counter']
+            for endpoint, count in sorted(counts.items()):
+                lines.append(f'{metric}{{endpoint="{endpoint}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def _start(self):
+        g._metrics_start = time.perf_counter()
+        g._metrics_time = dict.fromkeys(COMPONENTS, 0.0)
+        g._metrics_calls = dict.fromkeys(COMPONENTS, 0)
+        g._metrics_statements = []
+
+    def _render_started(self, sender, template, context, **extra):
+        g._metrics_render_start = time.perf_counter()
+
+    def _render_finished(self, sender, template, context, **extra):
+        started = g.pop('_metrics_render_start', None)
+        if started is not None:
+            self.record('render', time.perf_counter() - started)
+
+    def _finish(self, response):
+        if '_metrics_start' not in g:
+            return response
+        wall = time.perf_counter() - g._metrics_start
+        spent, calls = g._metrics_time, g._metrics_calls
+
+        timings = [f'{name};dur={spent[name] * 1000:.2f};desc="{calls[name]} calls"' for name in COMPONENTS if calls[name]]
+        timings.append(f'total;dur={wall * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+
+        endpoint = request.endpoint or 'unmatched'
+        with self._lock:
+            self._histograms['request'].observe(endpoint, wall)
+            for name in COMPONENTS:
+                self._histograms[name].observe(endpoint, spent[name])
+            key = (endpoint, response.status_code)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._queries[endpoint] = self._queries.get(endpoint, 0) + calls['db']
+            self._llm_calls[endpoint] = self._llm_calls.get(endpoint, 0) + calls['llm']
+
+        if wall >= self.slow_threshold and random.random() < self.slow_sample_rate:
+            statements = '\n'.join(f'  {seconds * 1000:8.2f} ms  {" ".join(statement.split())}'
+                                   for seconds, statement in g._metrics_statements)
+            logger.warning("Slow request %s %s (%s): %.0f ms total, %s\n%s", request.method, request.path, endpoint,
+                           wall * 1000, ', '.join(f'{name} {spent[name] * 1000:.0f} ms' for name in COMPONENTS),
+                           statements or '  (no SQL)')
+        return response
+
+request_metrics = RequestMetrics()
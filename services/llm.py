@@ -0,0 +1,366 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from services.instrumentation import request_metrics
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class LLMError(Exception):
+    """Base error for model calls."""
+
+class LLMUnavailable(LLMError):
+    """No backend is configured, or the circuit breaker is open."""
+
+class LLMTimeout(LLMError):
+    """The call did not finish within its deadline."""
+
+class TransientLLMError(LLMError):
+    """A failure worth retrying, raised by backends that do not map to SDK error types."""
+
+def _is_transient(error):
+    if isinstance(error, (TransientLLMError, LLMTimeout, ConnectionError, TimeoutError)):
+        return True
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return False
+    return isinstance(error, (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.TooManyRequests,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded
+    ))
+
+class GeminiBackend:
+    """Gemini API backend. The model object is built once and shared by every call in the process."""
+
+    def __init__(self, api_key, model_name='gemini-flash'):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt):
+        """Return (text, prompt_tokens, output_tokens); token counts are None when not reported."""
+        response = self.model.generate_content(prompt)
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return response.text, None, None
+        return response.text, usage.prompt_token_count, usage.candidates_token_count
+
+    def stream(self, prompt):
+        return _GeminiStream(self.model.generate_content(prompt, stream=True))
+
+class _GeminiStream:
+    def __init__(self, response):
+        self.response = response
+
+    def __iter__(self):
+        for chunk in self.response:
+            yield chunk.text
+
+    def cancel(self):
+        # Cancel the underlying gRPC call so generation stops upstream. `_iterator` is private to
+        # google-generativeai 0.3.x; on other versions this does nothing and the call runs to completion.
+        cancel = getattr(getattr(self.response, '_iterator', None), 'cancel', None)
+        if cancel:
+            cancel()
+
+class FakeBackend:
+    """Local stand-in for Gemini with configurable latency and error rate, for tests and benchmarks.
+
+    Each call takes latency plus token_latency per output word. The default responder
+    recognises the app's prompts and returns well-formed questions, verdicts and explanations.
+    """
+
+    def __init__(self, latency=0.0, token_latency=0.0, error_rate=0.0, responder=None, seed=None):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.responder = responder or default_fake_response
+        self._random = random.Random(seed)
+
+    def generate(self, prompt):
+        text = self._respond(prompt)
+        time.sleep(self.latency + self.token_latency * len(text.split()))
+        return text, len(prompt.split()), len(text.split())
+
+    def stream(self, prompt):
+        text = self._respond(prompt)
+        time.sleep(self.latency)
+        return _FakeStream(text, self.token_latency)
+
+    def _respond(self, prompt):
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise TransientLLMError('Simulated upstream failure')
+        return self.responder(prompt)
+
+class _FakeStream:
+    def __init__(self, text, token_latency):
+        self.text = text
+        self.token_latency = token_latency
+        self.cancelled = False
+
+    def __iter__(self):
+        for index, word in enumerate(self.text.split(' ')):
+            if self.cancelled:
+                return
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield word if index == 0 else ' ' + word
+
+    def cancel(self):
+        self.cancelled = True
+
+_BATCH_COUNT = re.compile(r'Generate (\d+) different questions')
+_GRADING_COUNT = re.compile(r'Grade these (\d+) answers')
+
+def default_fake_response(prompt):
+    """Plausible model output for the prompts this app sends."""
+    import json
+    from services.question_generation import mock_question_data
+
+    if "Respond with only 'Yes' or 'No'" in prompt:
+        # Stable verdict per prompt so repeated grading agrees with itself
+        return 'Yes' if hashlib.sha256(prompt.encode('utf-8')).digest()[0] % 2 else 'No'
+    grading = _GRADING_COUNT.search(prompt)
+    if grading:
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        return json.dumps(['Yes' if digest[index % len(digest)] % 2 else 'No' for index in range(int(grading.group(1)))])
+    batch = _BATCH_COUNT.search(prompt)
+    if batch:
+        questions = [mock_question_data('the subject', 1) for _ in range(int(batch.group(1)))]
+        return f"```json\n{json.dumps(questions)}\n```"
+    if 'Generate a question about' in prompt:
+        return f"```json\n{json.dumps(mock_question_data('the subject', 1))}\n```"
+    return 'This is a sample explanation. ' * 20
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets a single trial call through once reset_timeout has passed."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self):
+        """Give up an admitted call without a verdict, so the next call can be the trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+class LLMClient:
+    """Process-wide model client with per-call deadlines, jittered retries and a circuit breaker."""
+
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        self.timeout = 20.0
+        self.max_retries = 2
+        self.backoff = 0.5
+        self.breaker = CircuitBreaker()
+        self._executor = None
+        self._max_workers = 16
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._counters = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'short_circuited': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+            'prompt_tokens': 0,
+            'output_tokens': 0,
+            'unreported_token_calls': 0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Build the backend once from app config."""
+        self.timeout = app.config['LLM_TIMEOUT']
+        self.max_retries = app.config['LLM_MAX_RETRIES']
+        self.backoff = app.config['LLM_BACKOFF']
+        self.breaker = CircuitBreaker(app.config['LLM_BREAKER_THRESHOLD'], app.config['LLM_BREAKER_RESET'])
+        self._max_workers = app.config['LLM_MAX_CONCURRENCY']
+
+        if self.backend is None:
+            if app.config['LLM_BACKEND'] == 'fake':
+                self.backend = FakeBackend(
+                    latency=app.config['LLM_FAKE_LATENCY'],
+                    error_rate=app.config['LLM_FAKE_ERROR_RATE']
+                )
+            else:
+                api_key = app.config.get('GEMINI_API_KEY')
+                if api_key and api_key != 'your-api-key':
+                    self.backend = GeminiBackend(api_key, app.config['LLM_MODEL'])
+
+    @property
+    def available(self):
+        """Whether a backend is configured; callers fall back to mock behaviour when it is not."""
+        return self.backend is not None
+
+    def generate(self, prompt, timeout=None):
+        """Return the model's text for a prompt, retrying transient failures."""
+        attempt = 0
+        while True:
+            self._admit()
+            start = time.perf_counter()
+            try:
+                text, prompt_tokens, output_tokens = self._call(self.backend.generate, prompt, timeout)
+            except Exception as e:
+                self._record_failure(e, time.perf_counter() - start)
+                if attempt >= self.max_retries or not _is_transient(e):
+                    raise
+                attempt += 1
+                self._count('retries')
+                # Exponential backoff with full jitter
+                time.sleep(random.uniform(0, self.backoff * (2 ** (attempt - 1))))
+                continue
+            self._record_success(time.perf_counter() - start, prompt_tokens, output_tokens)
+            return text
+
+    def stream(self, prompt, timeout=None):
+        """Yield text chunks as they are generated. Closing the generator cancels the upstream call.
+
+        The deadline covers opening the stream; retries are not attempted once output has started.
+        """
+        self._admit()
+        start = time.perf_counter()
+        handle = None
+        finished = False
+        output_words = 0
+        try:
+            handle = self._call(self.backend.stream, prompt, timeout)
+            for text in handle:
+                output_words += len(text.split())
+                yield text
+            finished = True
+        except GeneratorExit:
+            # The client went away: no verdict on the model, but a half-open trial must not stay claimed
+            self.breaker.release_trial()
+            raise
+        except Exception as e:
+            self._record_failure(e, time.perf_counter() - start)
+            raise
+        finally:
+            if not finished and handle is not None:
+                handle.cancel()
+        self._record_success(time.perf_counter() - start, None, output_words)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            latencies = sorted(self._latencies)
+        stats['breaker_state'] = self.breaker.state
+        stats['latency_avg'] = stats['latency_total'] / stats['calls'] if stats['calls'] else 0
+        for label, quantile in (('latency_p50', 0.5), ('latency_p95', 0.95), ('latency_p99', 0.99)):
+            stats[label] = latencies[min(len(latencies) - 1, int(quantile * len(latencies)))] if latencies else 0
+        return stats
+
+    def _admit(self):
+        if self.backend is None:
+            raise LLMUnavailable('No LLM backend is configured')
+        if not self.breaker.allow():
+            self._count('short_circuited')
+            raise LLMUnavailable('LLM circuit breaker is open')
+
+    def _call(self, function, prompt, timeout):
+        """Run a backend call on the shared pool and stop waiting for it at the deadline.
+
+        A call that has started cannot be cancelled: after a timeout it keeps its worker until the
+        SDK returns, so during an upstream stall up to LLM_MAX_CONCURRENCY abandoned calls can
+        occupy the pool and new calls queue behind them. Size it for in-flight plus stalled calls.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='llm')
+        future = self._executor.submit(function, prompt)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeout:
+            future.cancel()  # Only drops calls still queued
+            raise LLMTimeout(f'LLM call exceeded {timeout or self.timeout}s')
+
+    def _record_success(self, latency, prompt_tokens, output_tokens):
+        self.breaker.record_success()
+        with self._lock:
+            self._counters['successes'] += 1
+            self._record_latency(latency)
+            if prompt_tokens is None and output_tokens is None:
+                self._counters['unreported_token_calls'] += 1
+            self._counters['prompt_tokens'] += prompt_tokens or 0
+            self._counters['output_tokens'] += output_tokens or 0
+
+    def _record_failure(self, error, latency):
+        self.breaker.record_failure()
+        logger.warning("LLM call failed after %.2fs: %s", latency, error)
+        with self._lock:
+            self._counters['failures'] += 1
+            if isinstance(error, LLMTimeout):
+                self._counters['timeouts'] += 1
+            self._record_latency(latency)
+
+    def _record_latency(self, latency):
+        request_metrics.record('llm', latency)
+        self._counters['calls'] += 1
+        self._counters['latency_total'] += latency
+        self._counters['latency_max'] = max(self._counters['latency_max'], latency)
+        self._latencies.append(latency)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+llm = LLMClient()
@@ -0,0 +1,130 @@
+from services.query_counter import count_thread_queries
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import random
+import subprocess
+import threading
+import time
+
+# Endpoints in the order a study session hits them
+ENDPOINTS = ('login', 'generate_question', 'submit_answer', 'dashboard_stats', 'recent_activity', 'interactive_question')
+
+class LoadRecorder:
+    """Thread-safe per-endpoint latency, status and query-count samples."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {name: [] for name in ENDPOINTS}
+
+    def record(self, endpoint, latency, queries, ok):
+        with self._lock:
+            self._samples[endpoint].append((latency, queries, ok))
+
+    def summary(self, elapsed):
+        """Per-endpoint requests/s, latency percentiles (ms) and DB queries per request."""
+        with self._lock:
+            samples = {name: list(rows) for name, rows in self._samples.items()}
+
+        endpoints = {}
+        for name, rows in samples.items():
+            latencies = sorted(latency for latency, _, _ in rows)
+            queries = [count for _, count, _ in rows]
+            endpoints[name] = {
+                'requests': len(rows),
+                'errors': sum(1 for _, _, ok in rows if not ok),
+                'rps': round(len(rows) / elapsed, 2) if elapsed else 0,
+                'latency_ms': {
+                    'mean': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0,
+                    'p50': _percentile_ms(latencies, 0.5),
+                    'p95': _percentile_ms(latencies, 0.95),
+                    'p99': _percentile_ms(latencies, 0.99),
+                    'max': round(latencies[-1] * 1000, 2) if latencies else 0
+                },
+                'queries_per_request': {
+                    'mean': round(sum(queries) / len(queries), 2) if queries else 0,
+                    'max': max(queries) if queries else 0
+                }
+            }
+        return endpoints
+
+def run(app, engine, accounts, subject_ids, concurrency=8, iterations=20, seed=0):
+    """Drive concurrent study sessions through the app in-process and return a report dict.
+
+    Each account is one virtual user with its own cookie jar: it logs in, then repeats
+    generate question, submit answer, dashboard stats, recent activity and, for users in
+    interactive mode, a follow-up question. Queries are attributed to the thread that ran them.
+    """
+    recorder = LoadRecorder()
+    rng = random.Random(seed)
+    sessions = [(account, subject_ids, iterations, random.Random(rng.random())) for account in accounts]
+
+    with count_thread_queries(engine) as take_queries:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(_study_session, app, recorder, take_queries, *session) for session in sessions]:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+    endpoints = recorder.summary(elapsed)
+    total = sum(stats['requests'] for stats in endpoints.values())
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'revision': _git_revision(),
+            'database': engine.dialect.name,
+            'users': len(accounts),
+            'concurrency': concurrency,
+            'iterations': iterations,
+            'seed': seed
+        },
+        'totals': {
+            'elapsed_s': round(elapsed, 3),
+            'requests': total,
+            'errors': sum(stats['errors'] for stats in endpoints.values()),
+            'rps': round(total / elapsed, 2) if elapsed else 0
+        },
+        'endpoints': endpoints
+    }
+
+def _study_session(app, recorder, take_queries, account, subject_ids, iterations, rng):
+    client = app.test_client()
+
+    def call(endpoint, method, path, ok_statuses=(200,), **kwargs):
+        take_queries()
+        start = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        latency = time.perf_counter() - start
+        recorder.record(endpoint, latency, take_queries(), response.status_code in ok_statuses)
+        return response
+
+    # The login form redirects on success and re-renders itself on failure
+    login = call('login', 'POST', '/auth/login', ok_statuses=(302,),
+                 data={'email': account['email'], 'password': account['password']})
+    if login.status_code != 302:
+        return
+
+    for _ in range(iterations):
+        question = call('generate_question', 'GET', f'/learn/generate-question/{rng.choice(subject_ids)}')
+        payload = question.get_json(silent=True) or {}
+        if 'id' in payload:
+            # Multiple choice users pick a letter, free recall users type a short phrase
+            response = rng.choice('abcd') if 'options' in payload else rng.choice(('d', 'the fourth option', 'no idea'))
+            # 202 means the answer was stored and is being graded in the background
+            call('submit_answer', 'POST', '/learn/submit-answer', ok_statuses=(200, 202),
+                 json={'question_id': payload['id'], 'user_response': response, 'response_time': round(rng.uniform(2, 30), 2)})
+            if account['interactive_mode']:
+                call('interactive_question', 'POST', '/learn/interactive-question',
+                     json={'question_id': payload['id'], 'user_query': 'Why is that the answer?'})
+        call('dashboard_stats', 'GET', '/dashboard/stats')
+        call('recent_activity', 'GET', '/dashboard/recent-activity')
+
+def _percentile_ms(latencies, quantile):
+    if not latencies:
+        return 0
+    return round(latencies[min(len(latencies) - 1, int(quantile * len(latencies)))] * 1000, 2)
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,129 @@
+from fractions import Fraction
+import math
+import re
+import unicodedata
+
+_NUMBER = re.compile(r'^[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?$')
+_FRACTION = re.compile(r'^([-+]?\d+)\s*/\s*(\d+)$')
+_FILLER = frozenset(('a', 'an', 'the', 'and', 'of'))
+
+# Signs, decimal points, fractions and exponents stay inside a token: '-40', '7.4', '1/2', '10^-3'
+_TOKEN = re.compile(r'[\w.^/+-]+')
+_WORD_HYPHEN = re.compile(r'(?<=[^\W\d_])-(?=[^\W\d_])')
+_SUPERSCRIPT = re.compile('[⁰¹²³⁴-⁹⁺⁻]+')
+_SUPERSCRIPT_DIGITS = str.maketrans('⁰¹²³⁴⁵⁶⁷⁸⁹⁺⁻', '0123456789+-')
+_ROMAN = re.compile(r'm{0,3}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})')
+
+# Shorter words are too often one letter away from a different word ('desert', 'dessert')
+MIN_TYPO_LENGTH = 8
+
+def parse_number(text):
+    """Numeric value of a response such as '1,000', '3.5', '-2e3', '1/4' or '50%', or None."""
+    text = (text or '').strip().rstrip('.').replace(',', '').replace(' ', '')
+    scale = 1
+    if text.endswith('%'):
+        text, scale = text[:-1], 0.01
+    if _NUMBER.match(text):
+        return float(text) * scale
+    fraction = _FRACTION.match(text)
+    if fraction and int(fraction.group(2)):
+        return float(Fraction(int(fraction.group(1)), int(fraction.group(2)))) * scale
+    return None
+
+def tokenize(text):
+    """Case-folded tokens of a response, with accents, apostrophes and hyphens inside words dropped.
+
+    Everything that can change what an answer means is kept: signs, decimal points, fractions
+    and exponents ('x = -2', 'pH 7.4', '1/2', '10^-3', '10⁻³'), digits and roman numerals.
+    """
+    text = _SUPERSCRIPT.sub(lambda match: '^' + match.group().translate(_SUPERSCRIPT_DIGITS), text or '')
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.category(char).startswith('M'))
+    text = unicodedata.normalize('NFKC', text).casefold().replace("'", '').replace('’', '')
+    tokens = []
+    for token in _TOKEN.findall(_WORD_HYPHEN.sub('', text)):
+        token = token.rstrip('.-')
+        if not any(char.isdigit() for char in token):
+            token = token.lstrip('+-')
+        if any(char.isalnum() for char in token):
+            tokens.append(token)
+    return tokens
+
+def _content_words(text):
+    """Tokens without articles and conjunctions, which rarely change the answer.
+
+    A filler word is only dropped before another word, so the 'A' of 'Vitamin A' stays.
+    """
+    tokens = tokenize(text)
+    return [token for index, token in enumerate(tokens) if token not in _FILLER or index == len(tokens) - 1]
+
+def grade_locally(user_response, correct_answer, wrong_answers=()):
+    """Confident verdict for clear accepts and clear mistakes, or None when the model should decide.
+
+    A response is accepted when it matches the answer word for word. The only typo forgiven is
+    one missing or extra letter in a long alphabetic word; numbers, roman numerals and
+    anything carrying a sign, decimal point or exponent must match exactly, since
+    'World War I' and 'World War II' or '-40' and '40' are different answers. A response is
+    rejected only on positive evidence: a different number, an empty response, or a match
+    to one of wrong_answers (a question's other options). Everything else, including
+    synonyms and abbreviations ('automobile', 'Au', 'DNA'), is left to the model.
+    """
+    expected_number = parse_number(correct_answer)
+    if expected_number is not None:
+        given_number = parse_number(user_response)
+        if given_number is not None:
+            return math.isclose(given_number, expected_number, rel_tol=1e-6, abs_tol=1e-9)
+        if any(char.isalpha() for char in user_response or ''):
+            return None  # Possibly a number in words ("one thousand")
+
+    response = _content_words(user_response)
+    expected = _content_words(correct_answer)
+    if _matches(response, expected):
+        return True
+    if not response:
+        return False
+    for wrong_answer in wrong_answers:
+        wrong = _content_words(wrong_answer)
+        if wrong and not _matches(wrong, expected) and _matches(response, wrong):
+            return False
+    return None
+
+def grade_question_locally(question, user_response):
+    """grade_locally against a stored question: its answer or correct option text, with the other options as known mistakes."""
+    options = {'a': question.option_a, 'b': question.option_b, 'c': question.option_c, 'd': question.option_d}
+    correct_option = (question.correct_option or '').strip().lower()
+    wrong_answers = [text for letter, text in options.items() if text and letter != correct_option]
+    verdicts = [
+        grade_locally(user_response, answer, wrong_answers)
+        for answer in (question.answer, options.get(correct_option)) if answer
+    ]
+    if True in verdicts:
+        return True
+    if verdicts and all(verdict is False for verdict in verdicts):
+        return False
+    return None
+
+def _matches(response, expected):
+    return len(response) == len(expected) and all(map(_same_token, response, expected))
+
+def _same_token(given, expected):
+    if given == expected:
+        return True
+    if _exact_only(given) or _exact_only(expected):
+        return False
+    return (given.isalpha() and expected.isalpha()
+            and max(len(given), len(expected)) >= MIN_TYPO_LENGTH and _one_letter_apart(given, expected))
+
+def _exact_only(token):
+    return any(char.isdigit() for char in token) or _ROMAN.fullmatch(token) is not None
+
+def _one_letter_apart(a, b):
+    # One letter inserted or dropped; a changed letter is as likely a different word ('adsorption')
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) != len(b) + 1:
+        return False
+    for index, (char_a, char_b) in enumerate(zip(a, b)):
+        if char_a != char_b:
+            return a[index + 1:] == b[index:]
+    return True
@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+from flask import g
+from sqlalchemy import event
+import threading
+
+# Statement budgets per endpoint, including the user_loader lookup
+QUERY_BUDGETS = {
+    '/dashboard/stats': 3,
+    '/dashboard/recent-activity': 2,
+    '/dashboard/activity?limit=20': 2
+}
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements executed on an engine inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+@contextmanager
+def count_thread_queries(engine):
+    """Count statements per executing thread inside the block.
+
+    Yields a function that returns the calling thread's count since its last call and resets it,
+    so concurrent requests each see only their own queries.
+    """
+    counts = threading.local()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        counts.value = getattr(counts, 'value', 0) + 1
+
+    def take():
+        value = getattr(counts, 'value', 0)
+        counts.value = 0
+        return value
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield take
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def endpoint_query_counts(app, db, user_id, budgets=QUERY_BUDGETS):
+    """Request each budgeted path as a logged-in user; (path, status code, statements, budget) per path.
+
+    Call inside an app context. Each path is requested once, before its response is cached.
+    """
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    # First request runs one-off startup work that should not count; use a path whose response is not cached
+    client.get('/api/llm-stats')
+
+    results = []
+    for path, budget in budgets.items():
+        # Requests share the caller's app context, so drop what a real request would not inherit
+        g.pop('_login_user', None)
+        db.session.remove()
+        with count_queries(db.engine) as statements:
+            response = client.get(path)
+        results.append((path, response.status_code, statements, budget))
+    return results
@@ -0,0 +1,82 @@
+from models.user import User
+from models.question import Question
+from models.answer import Answer
+from models.mastery import Mastery
+from models.grading_verdict import GradingVerdict
+from models.daily_rollup import DailyRollup
+from models.difficulty_rollup import DifficultyRollup
+from models.review_state import ReviewState
+from sqlalchemy import func, select
+from datetime import datetime, timedelta
+
+# Tables that grow with usage; a full scan of any of these on a request path is a regression
+GROWING_TABLES = ('user', 'question', 'answer', 'mastery', 'grading_verdict', 'daily_rollup', 'difficulty_rollup', 'review_state')
+
+def hot_queries(user_id, subject_id, question_id):
+    """(name, statement) for each query that runs on a request path, built by the code that runs it."""
+    from controllers.dashboard import stats_queries, activity_query
+    from services.answer_export import export_query
+
+    daily_query, difficulty_query = stats_queries(user_id)
+    targeted_above, targeted_below = Question.targeted_queries(user_id, subject_id, 0.0, 0.7)
+    today = datetime.utcnow()
+    return [
+        ('load_user', select(User).where(User.id == user_id)),
+        ('mastery_lookup', Mastery.query.filter_by(user_id=user_id, subject_id=subject_id).statement),
+        ('unanswered_question', Question.unanswered_query(user_id, subject_id, 3).limit(1).statement),
+        ('targeted_question_above', targeted_above.limit(1).statement),
+        ('targeted_question_below', targeted_below.limit(1).statement),
+        ('grading_verdict_lookup', GradingVerdict.query.filter_by(question_id=question_id, response_hash='0' * 64).statement),
+        ('daily_rollup_bump', DailyRollup.query.filter_by(user_id=user_id, subject_id=subject_id, day=today.date()).statement),
+        ('difficulty_rollup_bump', DifficultyRollup.query.filter_by(user_id=user_id, difficulty=3).statement),
+        ('review_state_lookup', ReviewState.query.filter_by(user_id=user_id, question_id=question_id).statement),
+        ('review_next', ReviewState.queue_query(user_id).limit(1).statement),
+        ('review_next_in_subject', ReviewState.queue_query(user_id, subject_id).limit(1).statement),
+        ('stats_daily', daily_query.statement),
+        ('stats_difficulty', difficulty_query.statement),
+        ('activity_first_page', activity_query(user_id).limit(21).statement),
+        ('activity_deep_page', activity_query(user_id, (today - timedelta(days=60), 2 ** 31)).limit(21).statement),
+        ('export_resumed', export_query(user_id, after=(today - timedelta(days=60), 1)).limit(1000)),
+        ('export_all_users', export_query(start=today - timedelta(days=30)).limit(1000))
+    ]
+
+def explain(connection, statement):
+    """SQLite EXPLAIN QUERY PLAN detail lines for a statement."""
+    compiled = statement.compile(dialect=connection.dialect)
+    params = compiled.construct_params()
+    args = tuple(_sqlite_value(params[name]) for name in compiled.positiontup)
+    return [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), args)]
+
+def plan_problems(plan):
+    """Plan lines showing a full scan of a growing table or a sort that cannot use an index."""
+    problems = []
+    for line in plan:
+        words = line.split()
+        if len(words) > 1 and words[0] == 'SCAN' and words[1] in GROWING_TABLES:
+            problems.append(line)
+        elif line.startswith('USE TEMP B-TREE'):
+            problems.append(line)
+    return problems
+
+def pick_heavy_keys(connection):
+    """The busiest user, their most answered subject and a question in it, to probe worst-case plans."""
+    user_id = connection.execute(
+        select(Answer.user_id).group_by(Answer.user_id).order_by(func.count(Answer.id).desc()).limit(1)
+    ).scalar()
+    subject_id, question_id = connection.execute(
+        select(Question.subject_id, func.min(Question.id))
+        .join(Answer, Answer.question_id == Question.id)
+        .where(Answer.user_id == user_id)
+        .group_by(Question.subject_id)
+        .order_by(func.count(Answer.id).desc())
+        .limit(1)
+    ).one()
+    return user_id, subject_id, question_id
+
+def _sqlite_value(value):
+    # Only the plan matters, but the driver still needs bindable values
+    if isinstance(value, datetime):
+        return value.isoformat(' ')
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
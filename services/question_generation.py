@@ -0,0 +1,204 @@
+from app import db
+from models.question import Question
+import json
+import re
+import time
+
+_decoder = json.JSONDecoder()
+_FENCE = re.compile(r'```(?:json)?\s*(.*?)(?:```|$)', re.S)
+
+def build_question_prompt(subject_name, difficulty):
+    """Prompt asking Gemini for a single multiple-choice question."""
+    return f"""
+    Generate a question about {subject_name} at difficulty level {difficulty}/10.
+    
+    If difficulty is 1-3: Focus on basic recall, definitions, and simple concepts.
+    If difficulty is 4-6: Focus on application and understanding of concepts.
+    If difficulty is 7-10: Focus on analysis, evaluation, and synthesis of complex concepts.
+    
+    Format your response as a valid JSON object with the following structure:
+    {{
+        "text": "The question text",
+        "options": {{
+            "a": "First option",
+            "b": "Second option",
+            "c": "Third option",
+            "d": "Fourth option"
+        }},
+        "correct_option": "The correct option letter (a, b, c, or d)",
+        "explanation": "Detailed explanation of why the answer is correct"
+    }}
+    
+    The question should be challenging but fair for the given difficulty level.
+    """
+
+def build_batch_prompt(subject_name, difficulty, count):
+    """Prompt asking Gemini for several multiple-choice questions as one JSON array."""
+    return f"""
+    Generate {count} different questions about {subject_name} at difficulty level {difficulty}/10.
+    
+    If difficulty is 1-3: Focus on basic recall, definitions, and simple concepts.
+    If difficulty is 4-6: Focus on application and understanding of concepts.
+    If difficulty is 7-10: Focus on analysis, evaluation, and synthesis of complex concepts.
+    
+    Format your response as a valid JSON array of {count} objects, each with the following structure:
+    {{
+        "text": "The question text",
+        "options": {{
+            "a": "First option",
+            "b": "Second option",
+            "c": "Third option",
+            "d": "Fourth option"
+        }},
+        "correct_option": "The correct option letter (a, b, c, or d)",
+        "explanation": "Detailed explanation of why the answer is correct"
+    }}
+    
+    Each question should be challenging but fair for the given difficulty level, and no two should test the same fact.
+    """
+
+def parse_question(response_text):
+    """Extract the question JSON object from a model response."""
+    json_str = response_text.strip()
+    if '```json' in json_str:
+        json_str = json_str.split('```json')[1].split('```')[0].strip()
+    return json.loads(json_str)
+
+def parse_question_list(response_text):
+    """Extract question objects from a model response holding a JSON array.
+    
+    Tolerates a surrounding fenced block, brackets in prose before the array ("Here are [3]
+    questions: [...]") and a response cut off partway through: every complete object before
+    the truncation point is kept.
+    """
+    text = response_text.strip()
+    fence = _FENCE.search(text)
+    if fence:
+        text = fence.group(1).strip()
+
+    # The array is the first '[' that opens a list of objects
+    start = text.find('[')
+    while start != -1:
+        items = _objects_from(text, start + 1)
+        if items:
+            return items
+        start = text.find('[', start + 1)
+
+    # A lone object instead of an array
+    start = text.find('{')
+    if start == -1:
+        raise ValueError('No JSON array in response')
+    return [_decoder.raw_decode(text, start)[0]]
+
+def _objects_from(text, pos):
+    items = []
+    while pos < len(text):
+        char = text[pos]
+        if char in ' \t\r\n,':
+            pos += 1
+            continue
+        if char == ']':
+            break
+        try:
+            item, pos = _decoder.raw_decode(text, pos)
+        except ValueError:
+            break  # Truncated item: keep what was complete
+        if not isinstance(item, dict):
+            break
+        items.append(item)
+    return items
+
+def validate_question(question_data):
+    """Check that parsed data has every field a multiple-choice Question needs."""
+    if not isinstance(question_data, dict):
+        return False
+    options = question_data.get('options')
+    if not isinstance(options, dict):
+        return False
+    if not all(isinstance(options.get(key), str) and options[key].strip() for key in 'abcd'):
+        return False
+    if not isinstance(question_data.get('text'), str) or not question_data['text'].strip():
+        return False
+    if not isinstance(question_data.get('explanation'), str):
+        return False
+    correct_option = question_data.get('correct_option')
+    return isinstance(correct_option, str) and correct_option.strip().lower() in ('a', 'b', 'c', 'd')
+
+def question_from_data(question_data, subject_id, difficulty):
+    """Build an unsaved Question row from parsed question data."""
+    return Question(
+        text=question_data['text'],
+        answer=question_data['correct_option'],
+        explanation=question_data['explanation'],
+        difficulty=difficulty,
+        subject_id=subject_id,
+        option_a=question_data['options']['a'],
+        option_b=question_data['options']['b'],
+        option_c=question_data['options']['c'],
+        option_d=question_data['options']['d'],
+        correct_option=question_data['correct_option']
+    )
+
+def save_questions(question_data_list, subject_id, difficulty):
+    """Bulk-insert the valid items in one commit and return the saved questions."""
+    questions = [
+        question_from_data(question_data, subject_id, difficulty)
+        for question_data in question_data_list
+        if validate_question(question_data)
+    ]
+    if questions:
+        db.session.add_all(questions)
+        db.session.commit()
+    return questions
+
+def mock_question_data(subject_name, difficulty):
+    """Sample question used for development/testing when no API key is configured."""
+    return {
+        'text': f"This is a sample question about {subject_name} at difficulty level {difficulty}.",
+        'options': {
+            'a': 'First option',
+            'b': 'Second option',
+            'c': 'Third option',
+            'd': 'Fourth option (correct)'
+        },
+        'correct_option': 'd',
+        'explanation': 'This is a sample explanation for the correct answer.'
+    }
+
+class GeminiGenerator:
+    """Question generator backed by the shared LLM client, asking for up to batch_size questions per call."""
+
+    def __init__(self, client, batch_size=1):
+        self.client = client
+        self.batch_size = max(1, batch_size)
+
+    def __call__(self, subject_name, difficulty, count=1):
+        """Up to count valid questions; a failed call after the first keeps what earlier calls returned."""
+        questions = []
+        while len(questions) < count:
+            size = min(self.batch_size, count - len(questions))
+            try:
+                if size == 1:
+                    batch = [parse_question(self.client.generate(build_question_prompt(subject_name, difficulty)))]
+                else:
+                    batch = parse_question_list(self.client.generate(build_batch_prompt(subject_name, difficulty, size)))
+            except Exception:
+                if not questions:
+                    raise
+                break
+            batch = [question_data for question_data in batch if validate_question(question_data)]
+            if not batch:
+                break
+            questions.extend(batch[:size])
+        return questions
+
+class StubGenerator:
+    """Offline generator returning sample questions, for running without network access."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def __call__(self, subject_name, difficulty, count=1):
+        if self.latency:
+            time.sleep(self.latency)
+        return [mock_question_data(subject_name, difficulty) for _ in range(count)]
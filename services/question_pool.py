@@ -0,0 +1,189 @@
+from collections import deque
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class QuestionPool:
+    """Pre-generated questions keyed by (subject_id, difficulty), topped up by a background worker."""
+
+    def __init__(self, app=None, generator=None):
+        self.app = None
+        self.generator = generator
+        self.enabled = False
+        self.stores_questions = False
+        self.low_water = 3
+        self.target = 10
+        self._items = {}
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._refills = queue.Queue()
+        self._worker = None
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'refills': 0,
+            'refill_errors': 0,
+            'generated': 0,
+            'refill_lag_total': 0.0,
+            'refill_lag_max': 0.0,
+            'refill_lag_last': 0.0
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read pool settings from the app config and pick a generator."""
+        self.app = app
+        self.low_water = app.config['QUESTION_POOL_LOW_WATER']
+        self.target = max(app.config['QUESTION_POOL_TARGET'], self.low_water + 1)
+
+        if self.generator is None:
+            from services.llm import llm
+            from services.question_generation import GeminiGenerator, StubGenerator
+            if app.config['QUESTION_POOL_GENERATOR'] == 'stub':
+                self.generator = StubGenerator()
+            elif llm.available:
+                self.generator = GeminiGenerator(llm, batch_size=app.config['QUESTION_BATCH_SIZE'])
+
+        self.enabled = app.config['QUESTION_POOL_ENABLED'] and self.generator is not None
+        # With the pool off, refills still store a batch for the question bank; not where background threads do not survive
+        self.stores_questions = self.generator is not None and not app.config['SERVERLESS']
+
+    def pop(self, subject_id, difficulty):
+        """Take a ready question payload, or None on a miss. Either way, schedule a refill if low."""
+        if not self.enabled:
+            return None
+
+        key = (subject_id, difficulty)
+        with self._lock:
+            items = self._items.setdefault(key, deque())
+            item = items.popleft() if items else None
+            self._counters['hits' if item else 'misses'] += 1
+            remaining = len(items)
+
+        if remaining < self.low_water:
+            self.request_refill(subject_id, difficulty)
+        return item
+
+    def take(self, subject_id, difficulty, count, exclude=()):
+        """Take up to count ready payloads whose ids are not in exclude; skipped ones stay queued, in order, for others."""
+        if not self.enabled:
+            return []
+
+        key = (subject_id, difficulty)
+        with self._lock:
+            items = self._items.setdefault(key, deque())
+            taken, skipped = [], []
+            while items and len(taken) < count:
+                item = items.popleft()
+                (skipped if item['id'] in exclude else taken).append(item)
+            items.extendleft(reversed(skipped))
+            self._counters['hits'] += len(taken)
+            self._counters['misses'] += len(taken) < count
+            remaining = len(items)
+
+        if remaining < self.low_water:
+            self.request_refill(subject_id, difficulty)
+        return taken
+
+    def request_refill(self, subject_id, difficulty):
+        """Queue a refill for a key unless one is already outstanding.
+
+        With the pool off, the refill stores one batch in the question bank instead, where
+        Question.unanswered_query finds it.
+        """
+        if not (self.enabled or self.stores_questions):
+            return
+        key = (subject_id, difficulty)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending[key] = time.monotonic()
+        self._ensure_worker()
+        self._refills.put(key)
+
+    def size(self, subject_id, difficulty):
+        with self._lock:
+            return len(self._items.get((subject_id, difficulty), ()))
+
+    def stats(self):
+        """Snapshot of pool counters for monitoring."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['pool_sizes'] = {f'{s}:{d}': len(items) for (s, d), items in self._items.items()}
+            stats['pending_refills'] = len(self._pending)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0
+        stats['refill_lag_avg'] = stats['refill_lag_total'] / stats['refills'] if stats['refills'] else 0
+        return stats
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='question-pool-refill', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            key = self._refills.get()
+            try:
+                with self.app.app_context():
+                    self._refill(*key)
+            except Exception:
+                with self._lock:
+                    self._counters['refill_errors'] += 1
+                logger.exception("Question pool refill failed for %s", key)
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+    def _refill(self, subject_id, difficulty):
+        from app import db
+        from models.subject import Subject
+        from services.question_generation import save_questions
+
+        subject = db.session.get(Subject, subject_id)
+        if subject is None:
+            return
+
+        if not self.enabled:
+            questions = save_questions(self.generator(subject.name, difficulty, count=self.target), subject_id, difficulty)
+            with self._lock:
+                self._counters['generated'] += len(questions)
+            return
+
+        while self.size(subject_id, difficulty) < self.target:
+            needed = self.target - self.size(subject_id, difficulty)
+            questions = save_questions(self.generator(subject.name, difficulty, count=needed), subject_id, difficulty)
+            if not questions:
+                break
+
+            payloads = [{
+                'id': question.id,
+                'text': question.text,
+                'options': {
+                    'a': question.option_a,
+                    'b': question.option_b,
+                    'c': question.option_c,
+                    'd': question.option_d
+                },
+                'difficulty': difficulty
+            } for question in questions]
+
+            with self._lock:
+                self._items.setdefault((subject_id, difficulty), deque()).extend(payloads)
+                self._counters['generated'] += len(payloads)
+                requested_at = self._pending.get((subject_id, difficulty))
+                if requested_at is not None:
+                    # Lag runs from the refill request until fresh questions are ready to serve
+                    lag = time.monotonic() - requested_at
+                    self._counters['refills'] += 1
+                    self._counters['refill_lag_total'] += lag
+                    self._counters['refill_lag_max'] = max(self._counters['refill_lag_max'], lag)
+                    self._counters['refill_lag_last'] = lag
+                    self._pending[(subject_id, difficulty)] = None
+
+question_pool = QuestionPool()
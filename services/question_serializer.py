@@ -0,0 +1,145 @@
+from flask import Response
+from services.cache import LRUCache
+from sqlalchemy import event
+import json
+import threading
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder is used when it is not installed
+    orjson = None
+
+# Payload variants: what the study UI gets in each question mode, and the full record from Question.to_dict
+VARIANTS = ('multiple_choice', 'free_recall', 'full')
+
+def dumps(value):
+    """Compact UTF-8 JSON bytes, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def variant_for(question_mode):
+    return 'multiple_choice' if question_mode == 'multiple_choice' else 'free_recall'
+
+class QuestionSerializer:
+    """The one place question payloads are built, cached per (question id, variant) with their encoded JSON.
+
+    The payload fields never change once a question is stored, so entries only need dropping when
+    a question row is edited or deleted. Payload dicts are shared; copy one before adding keys.
+    """
+
+    def __init__(self, app=None):
+        self.lru = LRUCache()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.lru = LRUCache(max_size=app.config['QUESTION_PAYLOAD_CACHE_SIZE'])
+
+        from models.question import Question
+
+        @event.listens_for(Question, 'after_update')
+        @event.listens_for(Question, 'after_delete')
+        def invalidate_on_write(mapper, connection, target):
+            self.invalidate(target.id)
+
+    def payload(self, question, variant):
+        """Payload dict for a stored question."""
+        return self.serialize_many([question], variant)[0][0]
+
+    def encoded(self, question, variant):
+        """Encoded JSON for a stored question."""
+        return self.serialize_many([question], variant)[0][1]
+
+    def pooled(self, item, difficulty, variant):
+        """(payload, encoded) for a question pool item, which is already stored under the same id."""
+        entry = self._get((item['id'], variant))
+        if entry is None:
+            entry = self._put((item['id'], variant), _build(item['id'], item['text'], item['options'], difficulty, variant))
+        return entry
+
+    def serialize_many(self, questions, variant):
+        """(payload, encoded) per question, in order. Subject names for the full variant come from one query."""
+        entries = [self._get((question.id, variant)) for question in questions]
+        missing = [question for question, entry in zip(questions, entries) if entry is None]
+        if not missing:
+            return entries
+
+        names = _subject_names(missing) if variant == 'full' else {}
+        built = {
+            question.id: self._put((question.id, variant), _build(
+                question.id, question.text, _options(question), question.difficulty, variant,
+                question=question, subject_name=names.get(question.subject_id)
+            ))
+            for question in missing
+        }
+        return [entry if entry is not None else built[question.id] for question, entry in zip(questions, entries)]
+
+    def invalidate(self, question_id):
+        self.lru.delete_where(lambda key: key[0] == question_id)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0
+        stats['entries'] = len(self.lru)
+        stats['encoder'] = 'orjson' if orjson is not None else 'json'
+        return stats
+
+    def _get(self, key):
+        entry = self.lru.get(key)
+        with self._lock:
+            self._counters['hits' if entry is not None else 'misses'] += 1
+        return entry
+
+    def _put(self, key, payload):
+        entry = (payload, dumps(payload))
+        self.lru.set(key, entry)
+        return entry
+
+def json_response(encoded, status=200):
+    """Response for already-encoded JSON bytes."""
+    return Response(encoded, status=status, mimetype='application/json')
+
+def list_response(key, encoded_items):
+    """{key: [...]} response spliced together from already-encoded items, without re-encoding them."""
+    return json_response(b'{' + dumps(key) + b':[' + b','.join(encoded_items) + b']}')
+
+def _options(question):
+    return {'a': question.option_a, 'b': question.option_b, 'c': question.option_c, 'd': question.option_d}
+
+def _subject_names(questions):
+    from app import db
+    from models.subject import Subject
+
+    # Use subjects already loaded on the instances; fetch the rest in one query
+    names = {question.subject_id: question.subject.name for question in questions if 'subject' in question.__dict__}
+    wanted = {question.subject_id for question in questions} - names.keys()
+    if wanted:
+        names.update(db.session.query(Subject.id, Subject.name).filter(Subject.id.in_(wanted)))
+    return names
+
+def _build(question_id, text, options, difficulty, variant, question=None, subject_name=None):
+    if variant == 'multiple_choice':
+        return {'id': question_id, 'text': text, 'options': options, 'difficulty': difficulty}
+    if variant == 'free_recall':
+        # Free recall mode: no options
+        return {'id': question_id, 'text': text, 'difficulty': difficulty}
+
+    payload = {
+        'id': question_id,
+        'text': text,
+        'difficulty': difficulty,
+        'subject_id': question.subject_id,
+        'subject_name': subject_name,
+        'created_at': question.created_at.strftime('%Y-%m-%d %H:%M:%S') if question.created_at else None
+    }
+    # Include multiple choice options if present
+    if question.option_a:
+        payload['options'] = options
+    return payload
+
+question_serializer = QuestionSerializer()
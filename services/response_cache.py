@@ -0,0 +1,77 @@
+from flask import request, Response, make_response
+from flask_login import current_user
+from services.cache import LRUCache
+from datetime import datetime
+from functools import wraps
+import hashlib
+
+class RedisBackend:
+    """Cache backend over any Redis-compatible client exposing get, set(ex=...) and delete."""
+
+    def __init__(self, client, ttl=None):
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        value = self.client.get(key)
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=ttl or self.ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+class ResponseCache:
+    """Per-user JSON response cache with strong ETags derived from User.stats_version.
+
+    A matching If-None-Match gets a 304 from the version alone, and a miss renders once per
+    version into the backend, so polling between answers never reaches the Answer table.
+    """
+
+    def __init__(self, app=None, backend=None):
+        self.backend = backend
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.backend is not None:
+            return
+        if app.config['RESPONSE_CACHE_BACKEND'] == 'redis':
+            import redis
+            self.backend = RedisBackend(redis.Redis.from_url(app.config['RESPONSE_CACHE_URL']), app.config['RESPONSE_CACHE_TTL'])
+        else:
+            self.backend = LRUCache(max_size=app.config['RESPONSE_CACHE_SIZE'], ttl=app.config['RESPONSE_CACHE_TTL'])
+
+    def cached(self, view):
+        """Decorate a JSON view whose output depends only on the user's answer history and query string."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # The UTC date is part of the key so day-windowed stats roll over at midnight
+            key = ':'.join((
+                request.endpoint,
+                str(current_user.id),
+                str(current_user.stats_version or 0),
+                datetime.utcnow().strftime('%Y%m%d'),
+                request.query_string.decode('utf-8', 'replace')
+            ))
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                body = self.backend.get(key)
+                if body is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    body = response.get_data()
+                    self.backend.set(key, body)
+                response = Response(body, mimetype='application/json')
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+
+response_cache = ResponseCache()
@@ -0,0 +1,168 @@
+from app import db
+from models.answer import Answer
+from models.question import Question
+from models.daily_rollup import DailyRollup
+from models.difficulty_rollup import DifficultyRollup
+from models.archived_daily_total import ArchivedDailyTotal
+from models.archived_difficulty_total import ArchivedDifficultyTotal
+from models.user import User
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from datetime import date
+import math
+
+def record_answer(user_id, subject_id, difficulty, is_correct, response_time, answered_at):
+    """Fold one answer into the daily and difficulty rollups within the caller's transaction."""
+    record_answers(user_id, [(subject_id, difficulty, is_correct, response_time, answered_at)])
+
+def record_answers(user_id, answers, daily_model=DailyRollup, difficulty_model=DifficultyRollup, sign=1):
+    """Fold (subject_id, difficulty, is_correct, response_time, answered_at) answers into the rollups.
+
+    Answers are summed per rollup row first, so a batch costs one statement per row it touches.
+    The archive keeps its totals in tables of the same shape; sign=-1 takes answers back out.
+    """
+    daily = {}
+    by_difficulty = {}
+    for subject_id, difficulty, is_correct, response_time, answered_at in answers:
+        for totals in (daily.setdefault((subject_id, answered_at.date()), [0, 0, 0.0]),
+                       by_difficulty.setdefault(difficulty, [0, 0, 0.0])):
+            totals[0] += sign
+            totals[1] += sign if is_correct else 0
+            totals[2] += sign * (response_time or 0)
+
+    for (subject_id, day), totals in daily.items():
+        _bump(daily_model, {'user_id': user_id, 'subject_id': subject_id, 'day': day}, *totals)
+    for difficulty, totals in by_difficulty.items():
+        _bump(difficulty_model, {'user_id': user_id, 'difficulty': difficulty}, *totals)
+
+def _bump(model, keys, total, correct, response_time_sum):
+    """Increment a rollup row in SQL, inserting it on first use."""
+    changes = {
+        model.total: model.total + total,
+        model.correct: model.correct + correct,
+        model.response_time_sum: model.response_time_sum + response_time_sum
+    }
+    if model.query.filter_by(**keys).update(changes, synchronize_session=False):
+        return
+    try:
+        # Savepoint: a concurrent first answer may insert the same row
+        with db.session.begin_nested():
+            db.session.add(model(total=total, correct=correct, response_time_sum=response_time_sum, **keys))
+    except IntegrityError:
+        model.query.filter_by(**keys).update(changes, synchronize_session=False)
+
+def _as_date(value):
+    # SQLite returns func.date() as a string, PostgreSQL as a date
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def raw_daily_totals():
+    """(user_id, subject_id, day) -> (total, correct, response_time_sum) from graded Answer rows plus archived totals."""
+    rows = db.session.query(
+        Answer.user_id,
+        Question.subject_id,
+        func.date(Answer.created_at),
+        func.count(Answer.id),
+        func.sum(Answer.is_correct.cast(db.Integer)),
+        func.sum(Answer.response_time)
+    ).join(Question, Answer.question_id == Question.id)\
+     .filter(Answer.is_correct.isnot(None))\
+     .group_by(Answer.user_id, Question.subject_id, func.date(Answer.created_at))
+    totals = {
+        (user_id, subject_id, _as_date(day)): (total, correct or 0, response_time_sum or 0.0)
+        for user_id, subject_id, day, total, correct, response_time_sum in rows
+    }
+    archived = {
+        (row.user_id, row.subject_id, row.day): (row.total, row.correct, row.response_time_sum)
+        for row in ArchivedDailyTotal.query
+    }
+    return _add(totals, archived)
+
+def raw_difficulty_totals():
+    """(user_id, difficulty) -> (total, correct, response_time_sum) from graded Answer rows plus archived totals."""
+    rows = db.session.query(
+        Answer.user_id,
+        Answer.difficulty_at_time,
+        func.count(Answer.id),
+        func.sum(Answer.is_correct.cast(db.Integer)),
+        func.sum(Answer.response_time)
+    ).filter(Answer.is_correct.isnot(None))\
+     .group_by(Answer.user_id, Answer.difficulty_at_time)
+    totals = {
+        (user_id, difficulty): (total, correct or 0, response_time_sum or 0.0)
+        for user_id, difficulty, total, correct, response_time_sum in rows
+    }
+    archived = {
+        (row.user_id, row.difficulty): (row.total, row.correct, row.response_time_sum)
+        for row in ArchivedDifficultyTotal.query
+    }
+    return _add(totals, archived)
+
+def _add(totals, archived):
+    for key, (total, correct, response_time_sum) in archived.items():
+        have = totals.get(key, (0, 0, 0.0))
+        totals[key] = (have[0] + total, have[1] + correct, have[2] + response_time_sum)
+    # Rows emptied by a restore count as absent
+    return {key: value for key, value in totals.items() if value[0]}
+
+def rebuild():
+    """Replace both rollup tables with totals recomputed from Answer history, archived answers included.
+
+    Users whose totals changed get a new stats_version in the same transaction, so their cached
+    stats responses go stale. Returns (daily rows, difficulty rows, users changed).
+    """
+    daily = raw_daily_totals()
+    by_difficulty = raw_difficulty_totals()
+    changed = {key[0] for _, key, _, _ in
+               _diff('daily', daily, _stored_daily()) + _diff('difficulty', by_difficulty, _stored_difficulty())}
+
+    DailyRollup.query.delete()
+    DifficultyRollup.query.delete()
+    db.session.add_all(
+        DailyRollup(user_id=user_id, subject_id=subject_id, day=day, total=total, correct=correct, response_time_sum=response_time_sum)
+        for (user_id, subject_id, day), (total, correct, response_time_sum) in daily.items()
+    )
+    db.session.add_all(
+        DifficultyRollup(user_id=user_id, difficulty=difficulty, total=total, correct=correct, response_time_sum=response_time_sum)
+        for (user_id, difficulty), (total, correct, response_time_sum) in by_difficulty.items()
+    )
+    bump_stats_versions(changed)
+    db.session.commit()
+    return len(daily), len(by_difficulty), len(changed)
+
+def check():
+    """List differences between the rollup tables and the raw Answer rows plus archived totals."""
+    return (
+        _diff('daily', raw_daily_totals(), _stored_daily()) +
+        _diff('difficulty', raw_difficulty_totals(), _stored_difficulty())
+    )
+
+def bump_stats_versions(user_ids):
+    """Move each user's stats_version on within the caller's transaction, so cached stats responses and their ETags go stale.
+
+    Through the ORM, so the session loader cache drops its copy of each user as well.
+    """
+    if not user_ids:
+        return
+    for user in User.query.filter(User.id.in_(user_ids)):
+        user.stats_version = User.stats_version + 1
+
+def _stored_daily():
+    return {
+        (row.user_id, row.subject_id, row.day): (row.total, row.correct, row.response_time_sum)
+        for row in DailyRollup.query
+    }
+
+def _stored_difficulty():
+    return {
+        (row.user_id, row.difficulty): (row.total, row.correct, row.response_time_sum)
+        for row in DifficultyRollup.query
+    }
+
+def _diff(table, expected, stored):
+    mismatches = []
+    for key in expected.keys() | stored.keys():
+        want = expected.get(key, (0, 0, 0.0))
+        have = stored.get(key, (0, 0, 0.0))
+        if want[:2] != have[:2] or not math.isclose(want[2], have[2], rel_tol=1e-9, abs_tol=1e-6):
+            mismatches.append((table, key, want, have))
+    return mismatches
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+# The landing page renders without a session or stored data, so a cold start can serve it successfully
+DEFAULT_PATH = '/'
+
+# Run in a fresh interpreter: import the app the way the serverless entry point does, then serve one request
+_COLD_START = """
+import json
+import sys
+import time
+start = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+response = app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+print(json.dumps({'import_s': imported - start, 'first_response_s': served - start, 'status': response.status_code}))
+"""
+
+def profile(root, serverless=True, env=None, path=DEFAULT_PATH):
+    """Cold-start a subprocess with -X importtime, serve GET path, and return its timings and per-module import times.
+
+    An error response is not a startup time worth reporting, so a non-2xx status raises RuntimeError.
+    """
+    child_env = dict(os.environ, **(env or {}))
+    child_env['SERVERLESS'] = 'true' if serverless else 'false'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _COLD_START, path],
+        cwd=root, env=child_env, capture_output=True, text=True
+    )
+    timings = None
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('{'):
+            timings = json.loads(line)
+            break
+    if timings is None:
+        raise RuntimeError(f"Cold start failed (exit {result.returncode}):\n{result.stderr[-2000:]}")
+    if not 200 <= timings['status'] < 300:
+        raise RuntimeError(f"GET {path} returned HTTP {timings['status']} on a cold start")
+    timings['modules'] = parse_importtime(result.stderr)
+    return timings
+
+def parse_importtime(output):
+    """(module, self seconds, cumulative seconds) for each line of -X importtime output, in import order."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The column header
+        modules.append((fields[2].strip(), int(fields[0]) / 1e6, int(fields[1]) / 1e6))
+    return modules
+
+def top_level(modules):
+    """Import seconds spent in each top-level package and its submodules, heaviest first."""
+    totals = {}
+    for name, self_s, _ in modules:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_s
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
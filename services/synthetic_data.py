@@ -0,0 +1,144 @@
+from models.user import User
+from models.subject import Subject
+from models.question import Question
+from models.answer import Answer
+from models.mastery import Mastery
+from models.daily_rollup import DailyRollup
+from models.difficulty_rollup import DifficultyRollup
+from models.review_state import ReviewState
+from sqlalchemy import func, select, literal
+from datetime import datetime, timedelta
+from itertools import accumulate
+import random
+
+def seed(connection, users=100, subjects=10, questions=5000, answers=50000, days=120, seed=0, chunk_size=5000):
+    """Bulk-insert a synthetic learning history with realistic skew.
+
+    Activity per user and popularity per subject follow a Zipf-like curve, so a few heavy users
+    and subjects dominate as in production. Accuracy falls as difficulty rises.
+    Returns the number of rows inserted per table.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    # Bcrypt hash of 'password', so seeded users can log in
+    password = '$2b$12$/KOYM7mSJCkOzaW4fIxpfufHAyH9Tfqg4MFHbE3z6wcVHQC3udU.2'
+
+    first_user = _next_id(connection, User)
+    connection.execute(User.__table__.insert(), [{
+        'id': first_user + i,
+        'username': f'user{first_user + i}',
+        'email': f'user{first_user + i}@example.com',
+        'password': password,
+        'created_at': now - timedelta(days=days),
+        'last_login': now,
+        'display_explanations': True,
+        'question_mode': 'free_recall' if i % 4 == 0 else 'multiple_choice',
+        'interactive_mode': i % 2 == 0,
+        'stats_version': 0
+    } for i in range(users)])
+
+    first_subject = _next_id(connection, Subject)
+    connection.execute(Subject.__table__.insert(), [{
+        'id': first_subject + i,
+        'name': f'Subject {first_subject + i}',
+        'description': 'Synthetic subject',
+        'created_at': now - timedelta(days=days)
+    } for i in range(subjects)])
+
+    subject_weights = _zipf_cumulative_weights(subjects)
+    subject_ids = list(range(first_subject, first_subject + subjects))
+    first_question = _next_id(connection, Question)
+    question_difficulty = []
+    rows = []
+    for i in range(questions):
+        subject_id = rng.choices(subject_ids, cum_weights=subject_weights)[0]
+        difficulty = min(10, max(1, int(rng.gauss(4, 2))))
+        question_difficulty.append(difficulty)
+        rows.append({
+            'id': first_question + i,
+            'text': f'Synthetic question {first_question + i} about subject {subject_id}?',
+            'answer': 'd',
+            'explanation': 'Synthetic explanation.',
+            'difficulty': difficulty,
+            'created_at': now - timedelta(days=rng.uniform(0, days)),
+            'subject_id': subject_id,
+            'option_a': 'First option',
+            'option_b': 'Second option',
+            'option_c': 'Third option',
+            'option_d': 'Fourth option',
+            'correct_option': 'd'
+        })
+        if len(rows) >= chunk_size:
+            connection.execute(Question.__table__.insert(), rows)
+            rows = []
+    if rows:
+        connection.execute(Question.__table__.insert(), rows)
+
+    user_weights = _zipf_cumulative_weights(users)
+    user_ids = list(range(first_user, first_user + users))
+    rows = []
+    for _ in range(answers):
+        index = rng.randrange(questions)
+        difficulty = question_difficulty[index]
+        is_correct = rng.random() < 0.95 - difficulty * 0.07
+        rows.append({
+            'user_response': 'd' if is_correct else rng.choice('abc'),
+            'is_correct': is_correct,
+            'response_time': round(rng.lognormvariate(2, 0.5), 2),
+            'created_at': now - timedelta(seconds=rng.uniform(0, days * 86400)),
+            'user_id': rng.choices(user_ids, cum_weights=user_weights)[0],
+            'question_id': first_question + index,
+            'mode': 'multiple_choice',
+            'difficulty_at_time': difficulty
+        })
+        if len(rows) >= chunk_size:
+            connection.execute(Answer.__table__.insert(), rows)
+            rows = []
+    if rows:
+        connection.execute(Answer.__table__.insert(), rows)
+
+    return {'user': users, 'subject': subjects, 'question': questions, 'answer': answers}
+
+def derive_aggregates(connection):
+    """Fill the mastery, rollup and review tables from seeded Answer rows with set-based INSERT ... SELECT."""
+    correct = func.sum(Answer.is_correct.cast(DailyRollup.total.type))
+    by_subject = select(
+        Answer.user_id, Question.subject_id, func.date(Answer.created_at),
+        func.count(Answer.id), correct, func.sum(Answer.response_time)
+    ).join(Question, Answer.question_id == Question.id)\
+     .group_by(Answer.user_id, Question.subject_id, func.date(Answer.created_at))
+    connection.execute(DailyRollup.__table__.insert().from_select(
+        ['user_id', 'subject_id', 'day', 'total', 'correct', 'response_time_sum'], by_subject
+    ))
+
+    by_difficulty = select(
+        Answer.user_id, Answer.difficulty_at_time, func.count(Answer.id), correct, func.sum(Answer.response_time)
+    ).group_by(Answer.user_id, Answer.difficulty_at_time)
+    connection.execute(DifficultyRollup.__table__.insert().from_select(
+        ['user_id', 'difficulty', 'total', 'correct', 'response_time_sum'], by_difficulty
+    ))
+
+    # Totals only: the rolling window needs an ordered replay (flask backfill-mastery)
+    mastery = select(
+        Answer.user_id, Question.subject_id, func.count(Answer.id), correct, literal(''), literal(1)
+    ).join(Question, Answer.question_id == Question.id)\
+     .group_by(Answer.user_id, Question.subject_id)
+    connection.execute(Mastery.__table__.insert().from_select(
+        ['user_id', 'subject_id', 'attempts', 'correct', 'recent', 'difficulty'], mastery
+    ))
+
+    # Approximate schedule: every answered question is due again from its last answer
+    last_answered = func.max(Answer.created_at)
+    reviews = select(
+        Answer.user_id, Answer.question_id, last_answered, last_answered,
+        literal(1), literal(1.0), literal(2.5), literal(0)
+    ).group_by(Answer.user_id, Answer.question_id)
+    connection.execute(ReviewState.__table__.insert().from_select(
+        ['user_id', 'question_id', 'due_at', 'last_reviewed_at', 'repetitions', 'interval_days', 'ease', 'lapses'], reviews
+    ))
+
+def _next_id(connection, model):
+    return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+def _zipf_cumulative_weights(count, exponent=1.1):
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
@@ -0,0 +1,82 @@
+from services.cache import LRUCache
+from flask import session, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+import secrets
+import threading
+
+# Session key holding this browser's user-record revision, a random token so browsers never share one
+REVISION_KEY = '_user_rev'
+
+class UserCache:
+    """Short-lived cache of User column values so the session loader can skip its per-request SELECT.
+
+    Entries are keyed by (user id, revision), where the revision lives in the Flask session.
+    Any write to a User row drops that user's entries in this process and gives the writer a fresh
+    revision, so the writer's next request misses the cache in every process, not just this one.
+    Other browsers of the same user may see the old record for at most USER_CACHE_TTL seconds.
+    """
+
+    def __init__(self, app=None):
+        self.lru = LRUCache()
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.lru = LRUCache(max_size=app.config['USER_CACHE_SIZE'], ttl=app.config['USER_CACHE_TTL'])
+        self.enabled = app.config['USER_CACHE_TTL'] > 0
+
+        from models.user import User
+
+        @event.listens_for(User, 'after_update')
+        @event.listens_for(User, 'after_delete')
+        def invalidate_on_write(mapper, connection, target):
+            # Preference toggles, login timestamps and stats_version bumps all pass through here
+            self.invalidate(target.id)
+
+    def load(self, user_id):
+        """The user for the session loader, attached to the current session, or None if it does not exist."""
+        from app import db
+        from models.user import User
+
+        if not self.enabled:
+            return db.session.get(User, user_id)
+
+        key = (user_id, session.get(REVISION_KEY))
+        values = self.lru.get(key)
+        if values is not None:
+            self._count('hits')
+            user = User(**values)
+            # Mark it as already loaded so it joins the session as a clean persistent row, without a query
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        self._count('misses')
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self.lru.set(key, {column.key: getattr(user, column.key) for column in User.__table__.columns})
+        return user
+
+    def invalidate(self, user_id):
+        """Forget a user's cached record here, and make the current browser's next request reload it everywhere."""
+        self.lru.delete_where(lambda key: key[0] == user_id)
+        if has_request_context():
+            session[REVISION_KEY] = secrets.token_hex(8)
+        self._count('invalidations')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0
+        stats['entries'] = len(self.lru)
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+user_cache = UserCache()
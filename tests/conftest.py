@@ -0,0 +1,29 @@
+import os
+import tempfile
+import pytest
+
+# The app reads its configuration at import time, so point it at a scratch database first
+_directory = tempfile.mkdtemp(prefix='adaptive-learning-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ['SERVERLESS'] = 'false'
+os.environ['LLM_BACKEND'] = 'fake'
+
+from app import app as flask_app, db
+from services import synthetic_data
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture(scope='session')
+def dataset(app):
+    """A small skewed synthetic history, seeded once per test run."""
+    with db.engine.begin() as connection:
+        counts = synthetic_data.seed(connection, users=20, subjects=5, questions=500, answers=5000)
+        synthetic_data.derive_aggregates(connection)
+    return counts
@@ -0,0 +1,36 @@
+from app import db
+from models.answer import Answer
+from models.user import User
+from services import answer_archive, rollups
+from datetime import datetime, timedelta
+
+def test_archive_and_restore_keep_rollups_exact(app, dataset, tmp_path):
+    before = datetime.utcnow() - timedelta(days=30)
+    live = db.session.query(Answer.id).count()
+    eligible = answer_archive.eligible(before)
+    assert eligible and rollups.check() == []
+    affected = {user_id for user_id, in db.session.query(Answer.user_id)
+                .filter(Answer.created_at < before, Answer.is_correct.isnot(None)).distinct()}
+    versions = dict(db.session.query(User.id, User.stats_version))
+
+    archived, files = answer_archive.archive(str(tmp_path), before, batch_size=500)
+
+    assert archived == eligible
+    assert len(answer_archive.archive_files(str(tmp_path))) == files
+    assert db.session.query(Answer.id).count() == live - archived
+    assert answer_archive.has_archived()
+    assert rollups.check() == []
+    archived_versions = dict(db.session.query(User.id, User.stats_version))
+    assert all(archived_versions[user_id] > versions[user_id] for user_id in affected)
+    assert all(archived_versions[user_id] == version for user_id, version in versions.items() if user_id not in affected)
+
+    restored = sum(answer_archive.restore(path)[0] for path in answer_archive.archive_files(str(tmp_path)))
+
+    assert restored == archived
+    assert db.session.query(Answer.id).count() == live
+    assert not answer_archive.has_archived()
+    assert rollups.check() == []
+    restored_versions = dict(db.session.query(User.id, User.stats_version))
+    assert all(restored_versions[user_id] > archived_versions[user_id] for user_id in affected)
+    # Restoring again changes nothing
+    assert answer_archive.restore(answer_archive.archive_files(str(tmp_path))[0]) == (0, min(500, archived))
@@ -0,0 +1,34 @@
+from app import db
+from models.question import Question
+from models.subject import Subject
+from services.grading_cache import GradingCache, normalize_response
+import pytest
+
+def test_edited_answer_misses_without_invalidation(app):
+    subject = Subject(name='Grading cache test subject', description='')
+    db.session.add(subject)
+    db.session.flush()
+    question = Question(text='Capital of France?', answer='Paris', subject_id=subject.id, difficulty=1)
+    db.session.add(question)
+    db.session.flush()
+    cache = GradingCache()
+    cache.put(question, 'paris!', True)
+
+    assert cache.get(question, 'Paris') is True
+
+    # Another process edited the answer: this one never ran its invalidation listener
+    question.answer = 'Lyon'
+    assert cache.get(question, 'Paris') is None
+    db.session.rollback()
+
+@pytest.mark.parametrize('a, b', [
+    ('-40 degrees', '40 degrees'),
+    ('7.4', '74'),
+    ('1/2', '12'),
+])
+def test_sign_and_decimal_point_change_the_key(a, b):
+    assert normalize_response(a) != normalize_response(b)
+
+def test_case_spacing_and_trailing_punctuation_share_a_key():
+    assert normalize_response('  Paris! ') == normalize_response('paris') == normalize_response('PARIS.')
+    assert normalize_response('ｐａｒｉｓ') == 'paris'
@@ -0,0 +1,64 @@
+from services.local_grader import grade_locally, grade_question_locally
+from types import SimpleNamespace
+import json
+import os
+import pytest
+
+CORPUS = os.path.join(os.path.dirname(__file__), '..', 'services', 'local_grader_corpus.json')
+
+def _question(answer, options, correct_option):
+    return SimpleNamespace(answer=answer, correct_option=correct_option,
+                           **{f'option_{letter}': text for letter, text in options.items()})
+
+def test_settled_corpus_verdicts_are_right():
+    with open(CORPUS, encoding='utf-8') as f:
+        examples = json.load(f)
+    for example in examples:
+        verdict = grade_locally(example['response'], example['answer'], wrong_answers=example.get('wrong', ()))
+        assert verdict in (None, example['correct']), example
+
+@pytest.mark.parametrize('response, answer', [
+    ('automobile', 'car'),
+    ('Au', 'gold'),
+    ('deoxyribonucleic acid', 'DNA'),
+    ('London', 'Paris'),
+])
+def test_low_similarity_alone_is_left_to_the_model(response, answer):
+    assert grade_locally(response, answer) is None
+
+@pytest.mark.parametrize('response, answer', [
+    ('40 degrees', '-40 degrees'),
+    ('x = 2', 'x = -2'),
+    ('pH 74', 'pH 7.4'),
+    ('12 cup', '1/2 cup'),
+    ('10^3', '10^-3'),
+    ('World War II', 'World War I'),
+    ('Henry VII', 'Henry VIII'),
+    ('Vitamin B1', 'Vitamin B12'),
+    ('Type 2 diabetes', 'Type 1 diabetes'),
+    ('adsorption', 'absorption'),
+    ('sodium chlorite', 'sodium chloride'),
+    ('demand decreases', 'demand increases'),
+    ('Vitamin', 'Vitamin A'),
+])
+def test_one_character_that_changes_the_answer_is_not_accepted(response, answer):
+    assert grade_locally(response, answer) in (None, False)
+
+def test_one_letter_typo_in_a_long_word_is_accepted():
+    assert grade_locally('George Washingtn', 'George Washington') is True
+    assert grade_locally('10⁻³', '10^-3') is True
+    assert grade_locally('Pairs', 'Paris') is None
+
+def test_matching_another_option_is_rejected():
+    assert grade_locally('London', 'Paris', wrong_answers=['London', 'Rome', 'Berlin']) is False
+
+def test_numbers_and_empty_responses_are_settled():
+    assert grade_locally('1,000', '1000') is True
+    assert grade_locally('1944', '1945') is False
+    assert grade_locally('', 'Paris') is False
+
+def test_question_accepts_the_correct_option_text():
+    question = _question('b', {'a': 'Rome', 'b': 'Paris', 'c': 'London', 'd': 'Berlin'}, 'b')
+    assert grade_question_locally(question, 'paris') is True
+    assert grade_question_locally(question, 'London') is False
+    assert grade_question_locally(question, 'the capital of France') is None
@@ -0,0 +1,31 @@
+from app import db
+from models.locking import lock_rows
+from models.mastery import Mastery
+from models.subject import Subject
+from models.user import User
+from sqlalchemy.exc import IntegrityError
+import pytest
+
+def _new_user_and_subjects(count):
+    user = User(username='locking-test', email='locking-test@example.com', password='x')
+    subjects = [Subject(name=f'Locking test subject {index}', description='') for index in range(count)]
+    db.session.add(user)
+    db.session.add_all(subjects)
+    db.session.flush()
+    return user, [subject.id for subject in subjects]
+
+def test_missing_rows_are_inserted_and_existing_ones_reused(app):
+    user, subject_ids = _new_user_and_subjects(2)
+    first = Mastery.for_update(user.id, subject_ids[0])
+    rows = Mastery.for_update_many(user.id, subject_ids)
+    assert rows[subject_ids[0]] is first
+    assert sorted(rows) == sorted(subject_ids)
+    assert all(row.attempts == 0 and row.difficulty == 1 for row in rows.values())
+    db.session.rollback()
+
+def test_integrity_error_other_than_a_race_is_raised(app):
+    _, subject_ids = _new_user_and_subjects(1)
+    with pytest.raises(IntegrityError):
+        # A NOT NULL violation fails every retry, so it must be raised rather than retried
+        lock_rows(Mastery, None, 'subject_id', subject_ids, attempts=0, correct=0, recent='', difficulty=1)
+    db.session.rollback()
@@ -0,0 +1,14 @@
+from app import db
+from models.answer import Answer
+from services.query_counter import endpoint_query_counts, QUERY_BUDGETS
+from sqlalchemy import func
+
+def test_dashboard_endpoints_stay_within_query_budgets(app, dataset):
+    busiest = db.session.query(Answer.user_id).group_by(Answer.user_id).order_by(func.count(Answer.id).desc()).limit(1).scalar()
+
+    results = endpoint_query_counts(app, db, busiest)
+
+    assert [path for path, _, _, _ in results] == list(QUERY_BUDGETS)
+    for path, status_code, statements, budget in results:
+        assert status_code == 200, path
+        assert len(statements) <= budget, f"{path} ran {len(statements)} queries: {statements}"
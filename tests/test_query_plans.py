@@ -0,0 +1,26 @@
+from app import db
+from services import query_plans, synthetic_data
+from sqlalchemy import create_engine
+import pytest
+
+@pytest.fixture(scope='module')
+def plan_engine(app, tmp_path_factory):
+    """A separate SQLite file with enough skewed history for the planner to choose indexes as in production."""
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        synthetic_data.seed(connection, users=100, questions=5000, answers=50000)
+        synthetic_data.derive_aggregates(connection)
+        connection.exec_driver_sql('ANALYZE')
+    yield engine
+    engine.dispose()
+
+def test_hot_queries_do_not_scan_growing_tables(plan_engine):
+    with plan_engine.connect() as connection:
+        keys = query_plans.pick_heavy_keys(connection)
+        failures = {}
+        for name, statement in query_plans.hot_queries(*keys):
+            plan = query_plans.explain(connection, statement)
+            if query_plans.plan_problems(plan):
+                failures[name] = plan
+    assert not failures
@@ -0,0 +1,32 @@
+from services.question_generation import GeminiGenerator, mock_question_data, parse_question_list
+import json
+import pytest
+
+class _Client:
+    """Returns the given responses in turn; an exception instance is raised instead."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def generate(self, prompt):
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def _batch(count):
+    return json.dumps([mock_question_data('Chemistry', 1) for _ in range(count)])
+
+def test_brackets_in_prose_are_not_the_array():
+    questions = parse_question_list(f'Here are [3] questions: {_batch(3)}')
+    assert len(questions) == 3
+    assert all(question['correct_option'] == 'd' for question in questions)
+
+def test_later_failed_call_keeps_earlier_questions():
+    generator = GeminiGenerator(_Client(_batch(2), RuntimeError('timed out')), batch_size=2)
+    assert len(generator('Chemistry', 1, count=4)) == 2
+
+def test_first_failed_call_raises():
+    generator = GeminiGenerator(_Client(RuntimeError('timed out')), batch_size=2)
+    with pytest.raises(RuntimeError):
+        generator('Chemistry', 1, count=4)
@@ -0,0 +1,23 @@
+from collections import deque
+from services.question_pool import QuestionPool
+
+def _pool(ids):
+    pool = QuestionPool()
+    pool.enabled = True
+    pool.low_water = 0
+    pool._items[(1, 1)] = deque({'id': question_id} for question_id in ids)
+    return pool
+
+def test_take_skips_seen_questions_without_discarding_them():
+    pool = _pool([1, 2, 3, 4])
+
+    taken = pool.take(1, 1, 2, exclude={1, 3})
+
+    assert [item['id'] for item in taken] == [2, 4]
+    assert [item['id'] for item in pool._items[(1, 1)]] == [1, 3]
+
+def test_take_stops_at_count_and_keeps_order():
+    pool = _pool([1, 2, 3, 4])
+
+    assert [item['id'] for item in pool.take(1, 1, 1, exclude={1})] == [2]
+    assert [item['id'] for item in pool._items[(1, 1)]] == [1, 3, 4]
@@ -0,0 +1,22 @@
+from app import db
+from models.daily_rollup import DailyRollup
+from models.user import User
+from services import rollups
+
+def _versions():
+    return dict(db.session.query(User.id, User.stats_version))
+
+def test_rebuild_bumps_stats_version_only_for_changed_users(app, dataset):
+    assert rollups.check() == []
+    row = DailyRollup.query.order_by(DailyRollup.id).first()
+    row.total += 1
+    changed = row.user_id
+    db.session.commit()
+    before = _versions()
+
+    rollups.rebuild()
+
+    after = _versions()
+    assert rollups.check() == []
+    assert after[changed] == before[changed] + 1
+    assert all(after[user_id] == version for user_id, version in before.items() if user_id != changed)
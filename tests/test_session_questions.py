@@ -0,0 +1,25 @@
+from app import db
+from controllers.learning import SESSION_SERVED_LIMIT
+from models.subject import Subject
+from models.user import User
+from services.question_pool import question_pool
+
+def test_served_ids_stay_capped_across_subjects(app, dataset, monkeypatch):
+    # Background refills would write to the shared test database from another thread
+    monkeypatch.setattr(question_pool, 'request_refill', lambda subject_id, difficulty: None)
+    user_id = db.session.query(User.id).order_by(User.id).limit(1).scalar()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    for _ in range(3):
+        for subject_id, in db.session.query(Subject.id).order_by(Subject.id):
+            response = client.get(f'/learn/session/{subject_id}/questions?count=20')
+            assert response.status_code == 200
+
+    with client.session_transaction() as session:
+        served = session['served_questions']
+    assert 0 < len(served) <= SESSION_SERVED_LIMIT
+    assert len(set(served)) == len(served)
+    cookie = next(cookie for cookie in client.cookie_jar if cookie.name == 'session')
+    assert len(cookie.value) < 2048
@@ -0,0 +1,15 @@
+from services import startup_profile
+import os
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def test_cold_start_serves_the_landing_page():
+    timings = startup_profile.profile(ROOT)
+    assert timings['status'] == 200
+    assert 0 < timings['import_s'] <= timings['first_response_s']
+    assert timings['modules']
+
+def test_error_response_fails_the_profile():
+    with pytest.raises(RuntimeError, match='HTTP 404'):
+        startup_profile.profile(ROOT, path='/no-such-page')